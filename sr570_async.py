@@ -0,0 +1,168 @@
+"""asyncio front end for controlling several SR570 amplifiers at once.
+
+Each amplifier gets its own single-thread executor, so the writes to one
+serial port stay in order while different ports are driven in parallel.
+A group operation therefore takes as long as the slowest port.
+
+    async with AmplifierManager() as manager:
+        await manager.open("ASRL1::INSTR", alias="I0", groups=["transmission"])
+        await manager.open("ASRL2::INSTR", alias="It", groups=["transmission"])
+        await manager.group_set("transmission", sensitivity="10 nA/V")
+        await manager["I0"].set(filter_type=4, low_filter_freq=7)
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sr570_connection import SupervisedConnection
+from sr570_discovery import ResourceDiscovery
+from sr570_driver import SR570Driver
+from sr570_settle import SettleTracker
+
+
+class AsyncSR570:
+    """Coroutine wrapper around one SR570Driver."""
+
+    def __init__(self, driver, alias=None, resource_name=None, groups=()):
+        self.driver = driver
+        self.alias = alias
+        self.resource_name = resource_name
+        self.groups = set(groups)
+        self.settle = SettleTracker(driver)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sr570-{alias}")
+
+    @property
+    def state(self):
+        return self.driver.snapshot()
+
+    async def call(self, func, *args, **kwargs):
+        """Run ``func`` on this amplifier's I/O thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def set(self, values=None, force=False, **params):
+        """Set parameters, e.g. ``await amp.set(sensitivity=12)``. Returns an ApplyResult."""
+        values = dict(values or {}, **params)
+        return await self.call(self.driver.apply, values, force=force)
+
+    async def wait_settled(self):
+        """Wait until the output has settled after the last change."""
+        return await self.settle.wait_settled_async()
+
+    async def reset(self):
+        await self.call(self.driver.reset)
+
+    async def close(self):
+        await self.call(self.driver.close)
+        self._executor.shutdown(wait=False)
+
+    def __repr__(self):
+        return f"AsyncSR570(alias={self.alias!r}, resource_name={self.resource_name!r})"
+
+
+class AmplifierManager:
+    """Opens several amplifiers by resource name or alias and drives them concurrently.
+
+    Aliases are remembered by a ResourceDiscovery, so an amplifier opened
+    once by resource name can later be opened by alias alone. Each
+    amplifier's link is supervised and reconnects on its own if it drops.
+    """
+
+    def __init__(self, resource_manager=None, discovery=None):
+        self._rm = resource_manager
+        self._lock = threading.Lock()
+        self._discovery = discovery
+        self.amplifiers = {}  # alias -> AsyncSR570
+        self._opening = set()  # aliases reserved by an open in progress
+
+    @property
+    def discovery(self):
+        with self._lock:
+            if self._discovery is None:
+                self._discovery = ResourceDiscovery(self._rm)
+        return self._discovery
+
+    async def open(self, resource_name=None, alias=None, groups=(), **open_kwargs):
+        """Open one amplifier and register it under ``alias``.
+
+        Either ``resource_name`` or a previously remembered ``alias`` is needed.
+        """
+        if resource_name is None and alias is None:
+            raise ValueError("A resource name or an alias is needed")
+        alias = alias or resource_name
+        if alias in self.amplifiers or alias in self._opening:
+            raise ValueError(f"Amplifier alias already in use: {alias}")
+        self._opening.add(alias)  # before the await, so a concurrent open of the same alias fails
+        amp = AsyncSR570(SR570Driver(), alias, resource_name, groups)
+
+        def open_instrument():
+            if resource_name is None and self.discovery.resolve(alias) is None:
+                raise KeyError(f"Unknown amplifier alias: {alias}")
+            opener = functools.partial(self.discovery.open, alias, resource_name, **open_kwargs)
+            amp.driver.instrument = SupervisedConnection(amp.driver, opener).connect()
+            amp.resource_name = self.discovery.resolve(alias)
+
+        try:
+            await amp.call(open_instrument)
+        except BaseException:
+            amp._executor.shutdown(wait=False)
+            raise
+        else:
+            self.amplifiers[alias] = amp
+        finally:
+            self._opening.discard(alias)
+        return amp
+
+    async def open_many(self, specs):
+        """Open several amplifiers in parallel.
+
+        ``specs`` is a list of dicts with the keyword arguments of ``open``.
+        """
+        return await asyncio.gather(*(self.open(**spec) for spec in specs))
+
+    def __getitem__(self, name):
+        """Look an amplifier up by alias or resource name."""
+        if name in self.amplifiers:
+            return self.amplifiers[name]
+        for amp in self.amplifiers.values():
+            if amp.resource_name == name:
+                return amp
+        raise KeyError(f"Unknown amplifier: {name}")
+
+    def __iter__(self):
+        return iter(self.amplifiers.values())
+
+    def group(self, name):
+        """Return the amplifiers that belong to group ``name``."""
+        return [amp for amp in self.amplifiers.values() if name in amp.groups]
+
+    async def group_set(self, name, values=None, force=False, **params):
+        """Apply the same settings to every amplifier in a group, in parallel.
+
+        Returns a dict of alias -> ApplyResult.
+        """
+        amps = self.group(name)
+        if not amps:
+            raise KeyError(f"Unknown amplifier group: {name}")
+        results = await asyncio.gather(*(amp.set(values, force=force, **params) for amp in amps))
+        return {amp.alias: result for amp, result in zip(amps, results)}
+
+    async def set_many(self, settings, force=False):
+        """Apply per-amplifier settings in parallel: ``{alias: {key: value}}``."""
+        aliases = list(settings)
+        results = await asyncio.gather(*(self[alias].set(settings[alias], force=force) for alias in aliases))
+        return dict(zip(aliases, results))
+
+    async def close(self):
+        """Close every amplifier."""
+        await asyncio.gather(*(amp.close() for amp in self.amplifiers.values()))
+        self.amplifiers.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
@@ -0,0 +1,102 @@
+"""Sensitivity autorange with a pluggable measurement source.
+
+``measure()`` returns the downstream output voltage of the amplifier (from a
+DAQ channel, a voltmeter, ...). From one reading the input current is known,
+so the right SENS range is computed directly instead of stepping one range
+at a time. An overloaded output only tells us the current is too large, so
+in that case the range is opened up in growing jumps until a valid reading
+comes back, and the final range is then computed from that reading.
+
+The output is kept inside a window [lower, upper] x full scale. A new range
+is chosen so the predicted output lands at ``target`` x full scale; the
+window is wide enough that this never lands outside it again, which gives
+the hysteresis that stops the autorange from flapping between two ranges.
+"""
+
+import time
+
+from sr570_driver import SENSITIVITY_VALUES
+
+# Output voltage at which the SR570 overloads (V)
+OUTPUT_FULL_SCALE = 5.0
+
+# Largest ratio between two adjacent sensitivity ranges (200 µA/V -> 1 mA/V)
+MAX_STEP_RATIO = max(SENSITIVITY_VALUES[n + 1] / SENSITIVITY_VALUES[n]
+                     for n in range(len(SENSITIVITY_VALUES) - 1))
+
+
+class Autorange:
+    """Keeps the amplifier output inside a window by changing SENS."""
+
+    def __init__(self, driver, measure, full_scale=OUTPUT_FULL_SCALE, lower=0.05, target=0.4, upper=0.8,
+                 settle=0.05, sleep=time.sleep, min_range=0, max_range=max(SENSITIVITY_VALUES), tracker=None):
+        if not lower * MAX_STEP_RATIO < target < upper <= 1.0:
+            raise ValueError(f"Need lower * {MAX_STEP_RATIO:g} < target < upper <= 1 for hysteresis")
+        self.driver = driver
+        self.measure = measure
+        self.full_scale = full_scale
+        self.lower = lower
+        self.target = target
+        self.upper = upper
+        self.settle = settle
+        self.sleep = sleep
+        self.min_range = min_range
+        self.max_range = max_range
+        self.tracker = tracker  # SettleTracker; replaces the fixed ``settle`` wait
+        self.range_changes = 0
+
+    def wait_settled(self):
+        if self.tracker is not None:
+            self.tracker.wait_settled()
+        else:
+            self.sleep(self.settle)
+
+    def choose_range(self, current):
+        """Return the most sensitive range whose predicted output is at most ``target``."""
+        limit = self.target * self.full_scale
+        for n in range(self.min_range, self.max_range + 1):
+            if abs(current) / SENSITIVITY_VALUES[n] <= limit:
+                return n
+        return self.max_range
+
+    def in_window(self, voltage):
+        return self.lower * self.full_scale <= abs(voltage) <= self.upper * self.full_scale
+
+    def overloaded(self, voltage):
+        return abs(voltage) >= self.full_scale
+
+    def set_range(self, n):
+        if self.driver.set("sensitivity", n):
+            self.range_changes += 1
+            self.wait_settled()
+
+    def run(self, max_changes=8):
+        """Bring the output into the window. Returns the final SENS range.
+
+        Stops without changing anything if the output is already in the window.
+        """
+        n = self.driver.state["sensitivity"]
+        if n is None:
+            # unknown range: start from the least sensitive one, which cannot overload first
+            n = self.max_range
+            self.driver.set("sensitivity", n, force=True)
+            self.range_changes += 1
+            self.wait_settled()
+
+        jump = 3  # about a decade with the 1-2-5 ranges
+        for _ in range(max_changes):
+            voltage = self.measure()
+            if self.in_window(voltage):
+                return n
+            if self.overloaded(voltage):
+                if n >= self.max_range:
+                    return n  # nothing less sensitive to go to
+                new = min(self.max_range, n + jump)
+                jump *= 2
+            else:
+                new = self.choose_range(voltage * SENSITIVITY_VALUES[n])
+                if new == n:
+                    return n  # already the best we can do (at a range limit)
+            self.set_range(new)
+            n = new
+        return n
@@ -0,0 +1,183 @@
+"""Latency and throughput benchmarks against the simulated SR570.
+
+Every scenario runs three times: through SR570Driver, through "spaced" (the
+driver with the older "SENS 12" + CRLF encoding) and through the "legacy"
+path that writes one command per parameter as the GUI used to. The latency
+of an operation is the host time spent in the call plus the modelled wire
+time of the bytes it sent, so the numbers are meaningful without hardware
+and the suite runs in seconds (use --realtime to sleep for the wire time).
+
+    python sr570_benchmark.py
+    python sr570_benchmark.py --points 5000 --json results.json
+    python sr570_benchmark.py --serial loop://   # also time SerialTransport (needs pyserial)
+"""
+
+import argparse
+import json
+import time
+
+from sr570_driver import DEFAULT_VALUES, PARAMETERS, WRITE_TERMINATION, SR570Driver
+from sr570_sim import SimulatedResourceManager
+
+# Two full configurations that differ in every parameter
+CONFIG_A = dict(DEFAULT_VALUES)
+CONFIG_B = {
+    "sensitivity": 12,
+    "input_offset_level": 9,
+    "input_offset_sign": 1,
+    "bias_state": 1,
+    "bias_voltage": -1500,
+    "filter_type": 4,
+    "low_filter_freq": 7,
+    "high_filter_freq": 3,
+    "gain_mode": 1,
+    "invert_signal": 1,
+    "blank_output": 1,
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SpacedDriver(SR570Driver):
+    """The driver with the encoding it used before the compact one."""
+
+    def command(self, key, n):
+        return f"{PARAMETERS[key][0]} {n}"
+
+
+def legacy_apply(session, values):
+    """Send one write per parameter, as apply_defaults_to_instrument used to."""
+    for key, value in values.items():
+        session.write(f"{PARAMETERS[key][0]} {value}")
+
+
+def measure(device, operations):
+    """Run callables and return per-operation latencies and totals."""
+    device.reset_counters()
+    latencies = []
+    for operation in operations:
+        wire_before = device.wire_time
+        start = time.perf_counter()
+        operation()
+        host = time.perf_counter() - start
+        if not device.realtime:
+            host += device.wire_time - wire_before
+        latencies.append(host)
+
+    total = sum(latencies)
+    count = len(latencies)
+    return {
+        "operations": count,
+        "ops_per_s": count / total if total else float("inf"),
+        "commands_per_s": len(device.log) / total if total else float("inf"),
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "bytes_per_op": device.bytes_received / count,
+        "writes_per_op": device.writes / count,
+        "total_s": total,
+    }
+
+
+def scenarios(points):
+    """Yield (name, list of operations) pairs for the driver and the legacy path."""
+    single = [{"sensitivity": 12 if i % 2 else 13} for i in range(points)]
+    full = [CONFIG_B if i % 2 else CONFIG_A for i in range(points)]
+    # a scan re-asserts the full configuration at every point, only the bias moves
+    scan = [dict(CONFIG_B, bias_voltage=-2000 + (i % 4000)) for i in range(points)]
+    return [("single apply", single), ("full configuration", full), ("scan re-assert", scan)]
+
+
+def run(points=1000, realtime=False, write_overhead=0.0):
+    results = []
+    for name, steps in scenarios(points):
+        for path in ("driver", "spaced", "legacy"):
+            rm = SimulatedResourceManager(realtime=realtime, write_overhead=write_overhead)
+            if path == "driver":
+                session = rm.open_resource("ASRL1::INSTR", write_termination=WRITE_TERMINATION)
+            else:
+                session = rm.open_resource("ASRL1::INSTR", write_termination="\r\n")
+            device = session.device
+            if path != "legacy":
+                driver = (SR570Driver if path == "driver" else SpacedDriver)(session)
+                operations = [lambda values=values: driver.apply(values) for values in steps]
+            else:
+                operations = [lambda values=values: legacy_apply(session, values) for values in steps]
+            result = measure(device, operations)
+            result.update(scenario=name, path=path)
+            results.append(result)
+    return results
+
+
+def run_serial(url, points=1000):
+    """Time the driver over SerialTransport on ``url`` (e.g. "loop://" or a real port).
+
+    Latency here is the real time of the pyserial write including the drain,
+    so on hardware it contains the wire time.
+    """
+    from sr570_serial import SerialTransport
+
+    results = []
+    for name, steps in scenarios(points):
+        transport = SerialTransport(url)
+        driver = SR570Driver(transport)
+        latencies = []
+        applied = []
+        for values in steps:
+            start = time.perf_counter()
+            applied.append(driver.apply(values))
+            latencies.append(time.perf_counter() - start)
+        transport.close()
+        total = sum(latencies)
+        results.append({
+            "scenario": name, "path": "serial", "operations": points,
+            "ops_per_s": points / total if total else float("inf"),
+            "commands_per_s": sum(len(r.changes) for r in applied) / total if total else float("inf"),
+            "p50_ms": percentile(latencies, 0.50) * 1e3,
+            "p95_ms": percentile(latencies, 0.95) * 1e3,
+            "p99_ms": percentile(latencies, 0.99) * 1e3,
+            "bytes_per_op": sum(r.bytes_sent for r in applied) / points,
+            "writes_per_op": sum(len(r.frames) for r in applied) / points,
+            "total_s": total,
+        })
+    return results
+
+
+def print_table(results):
+    header = f"{'scenario':<20} {'path':<7} {'ops/s':>9} {'cmd/s':>9} {'p50 ms':>8} {'p95 ms':>8} " \
+             f"{'p99 ms':>8} {'bytes/op':>9} {'writes/op':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<20} {r['path']:<7} {r['ops_per_s']:>9.1f} {r['commands_per_s']:>9.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['bytes_per_op']:>9.1f} {r['writes_per_op']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SR570 driver against the simulator.")
+    parser.add_argument("--points", type=int, default=1000, help="operations per scenario")
+    parser.add_argument("--realtime", action="store_true", help="sleep for the modelled wire time")
+    parser.add_argument("--write-overhead-ms", type=float, default=0.0,
+                        help="fixed cost added to every write (VISA call, USB adapter)")
+    parser.add_argument("--serial", metavar="URL",
+                        help="also time the driver over pyserial on this port or URL (e.g. loop://)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.points, args.realtime, args.write_overhead_ms / 1000)
+    if args.serial:
+        results += run_serial(args.serial, args.points)
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Command-line front end: apply a profile or individual settings and exit.
+
+Does not import tkinter, and pyvisa is only imported once a port is opened,
+so it starts fast enough for cron jobs and scan macros on machines without a
+display.
+
+    python sr570_cli.py --sens 12 --fltt 4 --lfrq 7
+    python sr570_cli.py --profile transmission --bslv -500
+    python sr570_cli.py --sens "10 nA/V" --dry-run
+
+Every option takes the 'n' value or the label shown in the GUI. A profile is
+applied first and individual options override it. The amplifier is not
+reset, so only the listed parameters are sent (use --reset to start from the
+power-on defaults). They are sent in a safe order: bias off first, bias on
+last (see sr570_profiles).
+
+    python sr570_cli.py --save-profile dark --sens 15 --bson 0
+"""
+
+import argparse
+import sys
+import time
+
+from sr570_driver import PARAMETERS, SR570Driver, coerce_value
+from sr570_profiles import ProfileStore, apply_profile, plan_transition
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Apply SR570 settings without the GUI.")
+    parser.add_argument("--profile", help="apply a saved profile first")
+    parser.add_argument("--list-profiles", action="store_true", help="list the saved profiles and exit")
+    parser.add_argument("--save-profile", metavar="NAME", help="save the given settings as a profile and exit")
+    for key, (command, choices) in PARAMETERS.items():
+        unit = " in mV" if key == "bias_voltage" else ""
+        parser.add_argument(f"--{command.lower()}", dest=key, metavar="N",
+                            help=f"{key.replace('_', ' ')}{unit} ({command})")
+    parser.add_argument("--reset", action="store_true", help="send *RST before applying")
+    parser.add_argument("--resource", help="VISA resource name, e.g. ASRL1::INSTR (needed for a new alias)")
+    parser.add_argument("--alias", help="amplifier alias remembered by discovery")
+    parser.add_argument("--backend", help="VISA backend, e.g. @py or @sr570-sim")
+    parser.add_argument("--dry-run", action="store_true", help="print the frames without opening the port")
+    return parser
+
+
+def collect_values(args, profiles):
+    """Return the parameter values requested by ``args``, validated."""
+    values = {}
+    if args.profile is not None:
+        values.update(profiles.get(args.profile))
+    for key in PARAMETERS:
+        value = getattr(args, key)
+        if value is not None:
+            values.pop(key, None)  # command-line options go last, in parameter order
+            values[key] = value
+    return {key: coerce_value(key, value) for key, value in values.items()}
+
+
+def open_driver(args):
+    # imported here so --dry-run and --help never load the VISA stack
+    from sr570_connection import SupervisedConnection
+    from sr570_discovery import DEFAULT_ALIAS, ResourceDiscovery, open_resource_manager
+
+    discovery = ResourceDiscovery(open_resource_manager(args.backend))
+    alias = args.alias or DEFAULT_ALIAS
+    if args.resource is None and discovery.resolve(alias) is None:
+        raise ValueError(f"Unknown amplifier alias {alias!r}: pass --resource once to bind it to a port")
+    driver = SR570Driver()
+    driver.instrument = SupervisedConnection(driver, lambda: discovery.open(alias, args.resource)).connect()
+    return driver
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    profiles = ProfileStore()
+
+    if args.list_profiles:
+        for name in profiles.names():
+            print(name)
+        return 0
+
+    try:
+        values = collect_values(args, profiles)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    if args.save_profile:
+        profiles.save(args.save_profile, values)
+        print(f"Saved profile {args.save_profile} ({len(values)} parameter(s))")
+        return 0
+    if not values and not args.reset:
+        print("Nothing to apply.")
+        return 0
+
+    if args.dry_run:
+        driver = SR570Driver()
+        if args.reset:
+            print("*RST")
+        for frame, _ in driver.compile(plan_transition(driver.state, values)):
+            print(frame)
+        return 0
+
+    try:
+        driver = open_driver(args)
+        try:
+            if args.reset:
+                driver.reset()
+            frames_before, bytes_before = driver.frames_sent, driver.bytes_sent
+            changes = apply_profile(driver, values)
+        finally:
+            driver.close()
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Sent {len(changes)} parameter(s) in {driver.frames_sent - frames_before} frame(s), "
+          f"{driver.bytes_sent - bytes_before} bytes, {time.perf_counter() - start:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Supervised instrument connection with automatic reconnect and state replay.
+
+A SupervisedConnection sits between an SR570Driver and the VISA resource.
+Write errors are classified as "timeout", "io" or "closed". A timeout or
+I/O error is usually a transient serial hiccup, so the same frame is retried
+on the open session a few times with a short backoff; every SR570 command
+sets an absolute value, so sending a frame twice is harmless. When the
+session is closed, or the retries run out, the port is reopened with
+exponential backoff and the driver's last known state written back in one
+burst. The amplifier is not reset, so a cable glitch mid-scan does not lose
+the gain and offset the experiment was running with.
+"""
+
+import time
+
+# VISA status codes that mean the session or the link is gone
+VI_ERROR_CONN_LOST = -1073807194
+VI_ERROR_INV_OBJECT = -1073807346
+VI_ERROR_IO = -1073807298
+VI_ERROR_RSRC_NFOUND = -1073807343
+VI_ERROR_TMO = -1073807339
+
+# Error classes returned by classify_error
+TIMEOUT = "timeout"  # no answer in time; the session is still usable
+IO = "io"  # the transfer failed; the session may still be usable
+CLOSED = "closed"  # the session or the port is gone
+
+ERROR_CODE_KINDS = {
+    VI_ERROR_TMO: TIMEOUT,
+    VI_ERROR_IO: IO,
+    VI_ERROR_CONN_LOST: CLOSED,
+    VI_ERROR_INV_OBJECT: CLOSED,
+    VI_ERROR_RSRC_NFOUND: CLOSED,
+}
+
+
+def classify_error(exc):
+    """Return TIMEOUT, IO or CLOSED for an instrument link error, None for anything else.
+
+    Checked by name and status code so pyvisa does not have to be imported.
+    """
+    kind = ERROR_CODE_KINDS.get(getattr(exc, "error_code", None))
+    if kind is not None:
+        return kind
+    if type(exc).__name__ == "InvalidSession" or isinstance(exc, ConnectionError):
+        return CLOSED
+    if isinstance(exc, TimeoutError) or type(exc).__name__ == "SerialTimeoutException":
+        return TIMEOUT
+    if isinstance(exc, OSError) or type(exc).__name__ == "SerialException":
+        return IO
+    return None
+
+
+def is_link_error(exc):
+    """True if ``exc`` means the link to the instrument is broken."""
+    return classify_error(exc) is not None
+
+
+class SupervisedConnection:
+    """Instrument proxy that reconnects a dropped link and replays the shadow state.
+
+    Install it as ``driver.instrument``. ``opener`` is a callable returning a
+    freshly opened VISA resource (e.g. ``ResourceDiscovery.open``). The
+    resource name opened by ``connect`` is pinned: a reconnect that opens
+    any other port closes it again without writing and keeps trying.
+    """
+
+    def __init__(self, driver, opener, initial_backoff=0.1, max_backoff=5.0, max_attempts=10,
+                 retries=2, retry_backoff=0.005):
+        self.driver = driver
+        self.opener = opener
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.retries = retries  # in-place retries of a frame after a timeout or I/O error
+        self.retry_backoff = retry_backoff  # first retry delay (s), doubled per retry
+        self.instrument = None
+        self.resource_name = None  # port pinned at connect()
+        self.reconnects = 0
+        self.reconnect_latencies = []  # seconds from link failure to replayed state
+
+    @property
+    def write_termination(self):
+        return getattr(self.instrument, "write_termination", "")
+
+    @property
+    def last_reconnect_latency(self):
+        return self.reconnect_latencies[-1] if self.reconnect_latencies else None
+
+    def connect(self):
+        """Open the instrument and pin its resource name. Returns self."""
+        self.instrument = self.opener()
+        self.resource_name = getattr(self.instrument, "resource_name", None)
+        return self
+
+    def write(self, message):
+        if self.instrument is None:
+            # an earlier reconnect gave up: try again instead of failing on the missing session
+            self.reconnect()
+            return self.instrument.write(message)
+        metrics = getattr(self.driver, "metrics", None)
+        delay = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return self.instrument.write(message)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None:
+                    raise
+                error = e
+                if kind == CLOSED or attempt == self.retries:
+                    break
+                if metrics is not None:
+                    metrics.record_retry(e)
+                time.sleep(delay)
+                delay *= 2
+        print(f"Link to instrument lost ({error}), reconnecting...")
+        self.reconnect()
+        return self.instrument.write(message)
+
+    def reconnect(self):
+        """Reopen the pinned port with backoff and replay the last known state.
+
+        If every attempt fails the driver is left disconnected.
+        """
+        start = time.perf_counter()
+        self._close_quietly()
+
+        delay = self.initial_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.instrument = self.opener()
+                opened = getattr(self.instrument, "resource_name", None)
+                if self.resource_name is not None and opened != self.resource_name:
+                    raise ValueError(f"Reconnect opened {opened} instead of {self.resource_name}")
+                self.replay()
+                break
+            except Exception as e:
+                if not is_link_error(e) and not isinstance(e, ValueError):
+                    raise
+                self._close_quietly()
+                if attempt == self.max_attempts:
+                    if self.driver.instrument is self:
+                        self.driver.instrument = None  # driver.connected is now False
+                    raise ConnectionError(f"Reconnect failed after {attempt} attempts: {e}") from e
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+        self.reconnects += 1
+        self.reconnect_latencies.append(time.perf_counter() - start)
+        metrics = getattr(self.driver, "metrics", None)
+        if metrics is not None:
+            metrics.record_reconnect(self.reconnect_latencies[-1])
+
+    def replay(self):
+        """Write every known parameter back to the instrument."""
+        for frame in self.driver.replay_frames():
+            self.instrument.write(frame)
+
+    def close(self):
+        if self.instrument is not None:
+            self.instrument.close()
+            self.instrument = None
+
+    def _close_quietly(self):
+        try:
+            self.close()
+        except Exception:
+            self.instrument = None
+
+
+def open_amplifier(driver, opener, defaults, replay=True, resume=False):
+    """Open a supervised connection for ``driver`` and bring the amplifier to a known state.
+
+    If any parameter is unknown the amplifier is reset and ``defaults``
+    applied; otherwise (a reconnect) the last known state is replayed, or
+    with ``replay=False`` trusted as it is. With ``resume`` the amplifier is
+    never reset: the known parameters are replayed (or, with
+    ``replay=False``, left alone) and the unknown ones stay unknown.
+    Returns the SupervisedConnection.
+    """
+    try:
+        connection = SupervisedConnection(driver, opener).connect()
+        driver.instrument = connection
+
+        if None in driver.state.values() and not resume:
+            driver.reset()
+            try:
+                driver.apply(defaults)
+            except Exception as e:
+                print(f"Error applying defaults to instrument: {e}")
+        elif replay:
+            # Reconnecting or resuming: restore the settings we know instead of resetting
+            connection.replay()
+    except Exception:
+        driver.instrument = None
+        raise
+    return connection
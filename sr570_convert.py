@@ -0,0 +1,68 @@
+"""Vectorized conversion of recorded output voltage to input current.
+
+Requires NumPy. Every setting can be a scalar or a per-sample array, so a
+scan in which the gain or offset changed part way through converts in one
+pass without Python-level loops.
+
+The SR570 output is taken as
+
+    V = inv * (I + offset) / S
+
+with S the sensitivity (A/V), offset = +IOLV for IOSN 1 and -IOLV for
+IOSN 0, and inv = -1 when INVT is 1. The input offset current only acts
+when it is switched on at the amplifier (IOON); pass
+``input_offset_level=None`` if it is off.
+"""
+
+import numpy as np
+
+from sr570_driver import IOLV_VALUES, SENSITIVITY_VALUES
+
+# Lookup tables indexed by the 'n' value of SENS and IOLV
+SENSITIVITY_TABLE = np.array([SENSITIVITY_VALUES[n] for n in range(len(SENSITIVITY_VALUES))])  # A/V
+IOLV_TABLE = np.array([IOLV_VALUES[n] for n in range(len(IOLV_VALUES))])  # A
+
+
+def to_current(voltage, sensitivity, input_offset_level=None, input_offset_sign=0, invert_signal=0):
+    """Convert output voltage (V) to input current (A).
+
+    ``sensitivity``, ``input_offset_level``, ``input_offset_sign`` and
+    ``invert_signal`` are SR570 'n' values, each a scalar or an array that
+    broadcasts against ``voltage``.
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    current = voltage * SENSITIVITY_TABLE.take(np.asarray(sensitivity, dtype=np.intp))
+
+    invert_signal = np.asarray(invert_signal)
+    if invert_signal.any():
+        current = np.where(invert_signal != 0, -current, current)
+
+    if input_offset_level is not None:
+        offset = IOLV_TABLE.take(np.asarray(input_offset_level, dtype=np.intp))
+        current = current - np.where(np.asarray(input_offset_sign) != 0, offset, -offset)
+    return current
+
+
+def state_to_current(voltage, state, offset_on=False):
+    """Convert with the settings of one shadow-state dict (``driver.snapshot()``).
+
+    The driver does not track IOON, so the IOLV/IOSN offset is only taken
+    into account with ``offset_on``.
+    """
+    return to_current(
+        voltage,
+        state["sensitivity"],
+        state["input_offset_level"] if offset_on else None,
+        state["input_offset_sign"],
+        state["invert_signal"],
+    )
+
+
+def expand_setting(sample_times, change_times, values):
+    """Return the setting in effect at each sample time.
+
+    ``change_times`` (sorted) and ``values`` describe when a setting changed
+    and to what. Samples taken before the first change get the first value.
+    """
+    index = np.searchsorted(np.asarray(change_times), np.asarray(sample_times), side="right") - 1
+    return np.asarray(values).take(np.clip(index, 0, None))
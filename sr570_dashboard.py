@@ -0,0 +1,188 @@
+"""Dashboard for many SR570 amplifiers, one tab each.
+
+The overview tab shows a one-line summary (sensitivity, filter, bias) per
+amplifier. The full control panel of an amplifier (an SR570GUI inside its
+tab) is only built when that tab is first opened, so a 16-channel setup
+opens quickly and holds sixteen summary rows, not sixteen copies of every
+combobox. The VISA resource manager is created on the first connect.
+
+    python sr570_dashboard.py I0=ASRL1::INSTR It=ASRL2::INSTR If
+    python sr570_dashboard.py --simulate 16
+
+An amplifier given without a resource name is opened by its remembered alias.
+"""
+
+import argparse
+import os
+import tempfile
+import tkinter as tk
+from tkinter import ttk
+
+from sr570_connection import open_amplifier
+from sr570_discovery import ResourceDiscovery
+from sr570_driver import BIAS_ON_OFF, DEFAULT_VALUES, FILTER_TYPE, SENSITIVITY_MAP, SR570Driver
+from sr570_model import StateModel
+from sr570_preamplifier_gui import SR570GUI
+from sr570_worker import IOWorker
+
+SUMMARY_KEYS = ("sensitivity", "filter_type", "bias_state", "bias_voltage")
+
+
+def summarize(state):
+    """One-line summary of a shadow state."""
+    bias = BIAS_ON_OFF.get(state["bias_state"], "?")
+    if state["bias_state"] == 1 and state["bias_voltage"] is not None:
+        bias += f" {state['bias_voltage'] / 1000:.3f} V"
+    return (f"{SENSITIVITY_MAP.get(state['sensitivity'], '?')}, "
+            f"{FILTER_TYPE.get(state['filter_type'], '?')}, bias {bias}")
+
+
+class AmplifierTab:
+    """One amplifier on the dashboard: summary row always, control panel on demand."""
+
+    def __init__(self, dashboard, row, alias, resource_name=None):
+        self.dashboard = dashboard
+        self.alias = alias
+        self.resource_name = resource_name
+        self.driver = SR570Driver()
+        self.model = StateModel(dashboard.root)
+        self.model.attach(self.driver)
+        self.panel = None
+        self._worker = None
+
+        overview = dashboard.overview
+        ttk.Label(overview, text=alias).grid(row=row, column=0, padx=10, pady=2, sticky="w")
+        self.summary_label = ttk.Label(overview, text="")
+        self.summary_label.grid(row=row, column=1, padx=10, pady=2, sticky="w")
+        self.status_label = ttk.Label(overview, text="Disconnected", foreground="red")
+        self.status_label.grid(row=row, column=2, padx=10, pady=2, sticky="w")
+        ttk.Button(overview, text="Open", command=self.select).grid(row=row, column=3, padx=10, pady=2)
+        self.model.subscribe(SUMMARY_KEYS, self.show_summary)
+
+        self.frame = ttk.Frame(dashboard.notebook)
+        dashboard.notebook.add(self.frame, text=alias)
+
+    @property
+    def worker(self):
+        """The amplifier's I/O thread, started on first use."""
+        if self._worker is None:
+            self._worker = IOWorker(self.dashboard.root)
+        return self._worker
+
+    def show_summary(self, state):
+        self.summary_label.config(text=summarize(state))
+
+    def show_status(self):
+        if self.driver.connected:
+            self.status_label.config(text="Connected", foreground="green")
+        else:
+            self.status_label.config(text="Disconnected", foreground="red")
+
+    def select(self):
+        self.dashboard.notebook.select(self.frame)
+
+    def build_panel(self):
+        """Build the full control panel in this amplifier's tab."""
+        if self.panel is None:
+            if self.resource_name is not None:
+                self.dashboard.discovery.remember(self.alias, self.resource_name)
+            self.panel = SR570GUI(self.frame, driver=self.driver, model=self.model, worker=self.worker,
+                                  discovery=self.dashboard.discovery, alias=self.alias)
+        return self.panel
+
+    def connect(self):
+        self.status_label.config(text="Connecting...", foreground="orange")
+        self.worker.submit(self.open_instrument, on_done=self.on_connected, on_error=self.on_connect_failed)
+
+    def open_instrument(self):
+        discovery = self.dashboard.discovery
+        open_amplifier(self.driver, lambda: discovery.open(self.alias, self.resource_name), DEFAULT_VALUES)
+
+    def on_connected(self, _result):
+        self.show_status()
+        if self.panel is not None:
+            self.panel.on_discovery_ready()
+
+    def on_connect_failed(self, e):
+        self.status_label.config(text=f"Failed ({e})", foreground="red")
+
+    def disconnect(self):
+        self.worker.submit(self.driver.close, on_done=self.on_disconnected, on_error=self.on_connect_failed)
+
+    def on_disconnected(self, _result):
+        self.show_status()
+        if self.panel is not None:
+            self.panel.on_discovery_ready()
+
+
+class Dashboard:
+    """Notebook with an overview tab and one lazily built tab per amplifier."""
+
+    def __init__(self, root, amplifiers, discovery=None):
+        self.root = root
+        self.root.title("SR570 Dashboard")
+        # no resource manager yet: ResourceDiscovery creates it on first use
+        self.discovery = discovery if discovery is not None else ResourceDiscovery()
+
+        self.notebook = ttk.Notebook(root)
+        self.notebook.grid(row=0, column=0, sticky="nsew")
+        root.columnconfigure(0, weight=1)
+        root.rowconfigure(0, weight=1)
+
+        self.overview = ttk.Frame(self.notebook)
+        self.notebook.add(self.overview, text="Overview")
+        button_frame = ttk.Frame(self.overview)
+        button_frame.grid(row=0, column=0, columnspan=4, pady=10, padx=10, sticky="w")
+        ttk.Button(button_frame, text="Connect All", command=self.connect_all).grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="Disconnect All", command=self.disconnect_all).grid(row=0, column=1, padx=5)
+
+        self.tabs = [AmplifierTab(self, row, alias, resource_name)
+                     for row, (alias, resource_name) in enumerate(amplifiers, start=1)]
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def on_tab_changed(self, _event):
+        selected = self.notebook.select()
+        if selected == str(self.overview):
+            for tab in self.tabs:  # a panel may have connected or disconnected its amplifier
+                tab.show_status()
+            return
+        for tab in self.tabs:
+            if str(tab.frame) == selected:
+                tab.build_panel()
+
+    def connect_all(self):
+        for tab in self.tabs:
+            if not tab.driver.connected:
+                tab.connect()
+
+    def disconnect_all(self):
+        for tab in self.tabs:
+            if tab.driver.connected:
+                tab.disconnect()
+
+
+def parse_amplifier(spec):
+    """Parse "alias=resource" or "alias" into (alias, resource_name)."""
+    alias, _, resource_name = spec.partition("=")
+    return alias, resource_name or None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SR570 multi-amplifier dashboard")
+    parser.add_argument("amplifiers", nargs="*", metavar="ALIAS[=RESOURCE]")
+    parser.add_argument("--simulate", type=int, metavar="N", help="use N simulated amplifiers instead of hardware")
+    args = parser.parse_args()
+
+    amplifiers = [parse_amplifier(spec) for spec in args.amplifiers]
+    discovery = None
+    if args.simulate:
+        from sr570_sim import SimulatedResourceManager
+        names = [f"ASRL{i}::INSTR" for i in range(1, args.simulate + 1)]
+        amplifiers += [(f"sim{i}", name) for i, name in enumerate(names, start=1)]
+        # keep the simulated aliases out of the real resource cache
+        cache_file = os.path.join(tempfile.gettempdir(), "sr570-sim-resources.json")
+        discovery = ResourceDiscovery(SimulatedResourceManager(names), cache_file=cache_file)
+
+    root = tk.Tk()
+    app = Dashboard(root, amplifiers, discovery)
+    root.mainloop()
@@ -0,0 +1,169 @@
+"""Cached VISA resource discovery with persistent amplifier aliases.
+
+Enumerating ASRL/USB ports can take seconds, so the resource list is cached
+with a TTL and saved to disk together with a mapping of alias -> port.
+Reconnecting goes straight to the known port. An alias is only ever bound
+to a port the user named: the SR570 cannot be identified over its
+listen-only link, so whatever answers on another port may be a different
+instrument. The cache is also dropped when a serial device is plugged in or
+removed.
+"""
+
+import os
+import threading
+import time
+
+from sr570_driver import CONFIG_DIR, WRITE_TERMINATION, load_json, save_json
+
+CACHE_FILE = os.path.join(CONFIG_DIR, "resources.json")
+
+# The SR570 is an RS-232 instrument, so only serial resources are scanned
+RESOURCE_QUERY = "ASRL?*::INSTR"
+
+# Alias used when the caller does not name the amplifier
+DEFAULT_ALIAS = "sr570"
+
+# VISA backend, e.g. "@py" or "@sr570-sim" for the built-in simulator
+VISA_BACKEND = os.environ.get("SR570_VISA_BACKEND", "")
+SIMULATOR_BACKEND = "@sr570-sim"
+SERIAL_BACKEND = "@serial"  # pyserial directly, without VISA (sr570_serial)
+
+# Directories whose modification time changes when a serial device appears or disappears
+HOTPLUG_PATHS = ("/dev", "/dev/serial/by-id")
+
+
+def open_resource_manager(backend=None):
+    """Create a VISA resource manager; pyvisa is imported only here.
+
+    ``backend`` defaults to $SR570_VISA_BACKEND. "@sr570-sim" returns a
+    SimulatedResourceManager and "@serial" a SerialResourceManager instead
+    of a pyvisa one.
+    """
+    backend = VISA_BACKEND if backend is None else backend
+    if backend == SIMULATOR_BACKEND:
+        from sr570_sim import SimulatedResourceManager
+        return SimulatedResourceManager()
+    if backend == SERIAL_BACKEND:
+        from sr570_serial import SerialResourceManager
+        return SerialResourceManager()
+    import pyvisa as visa
+    return visa.ResourceManager(backend) if backend else visa.ResourceManager()
+
+
+def hotplug_signature():
+    """Return a cheap fingerprint of the attached serial devices.
+
+    On platforms without a device directory this is None and only the TTL
+    applies.
+    """
+    signature = []
+    for path in HOTPLUG_PATHS:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return signature if any(v is not None for v in signature) else None
+
+
+class ResourceDiscovery:
+    """Finds and opens SR570 resources without rescanning on every connect."""
+
+    def __init__(self, resource_manager=None, cache_file=CACHE_FILE, ttl=300.0, query=RESOURCE_QUERY):
+        self._rm = resource_manager
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.query = query
+        self._lock = threading.RLock()
+        cache = load_json(cache_file, {}) or {}
+        self.aliases = dict(cache.get("aliases", {}))
+        self._resources = cache.get("resources")
+        self._scanned_at = cache.get("scanned_at", 0.0)
+        self._signature = cache.get("signature")
+
+    @property
+    def rm(self):
+        with self._lock:
+            if self._rm is None:
+                self._rm = open_resource_manager()
+            return self._rm
+
+    def _save(self):
+        try:
+            save_json(self.cache_file, {
+                "aliases": self.aliases,
+                "resources": self._resources,
+                "scanned_at": self._scanned_at,
+                "signature": self._signature,
+            })
+        except OSError as e:
+            print(f"Could not save resource cache: {e}")
+
+    def is_fresh(self):
+        """True if the cached resource list can be used without a rescan."""
+        return (self._resources is not None
+                and time.time() - self._scanned_at < self.ttl
+                and self._signature == hotplug_signature())
+
+    def list_resources(self, refresh=False):
+        """Return the serial resources, rescanning only when the cache is stale."""
+        with self._lock:
+            if refresh or not self.is_fresh():
+                self._resources = list(self.rm.list_resources(self.query))
+                self._scanned_at = time.time()
+                self._signature = hotplug_signature()
+                self._save()
+            return tuple(self._resources)
+
+    def invalidate(self):
+        """Drop the cached resource list (aliases are kept)."""
+        with self._lock:
+            self._resources = None
+            self._save()
+
+    def resolve(self, alias=DEFAULT_ALIAS):
+        """Return the port last used for ``alias``, or None."""
+        return self.aliases.get(alias)
+
+    def remember(self, alias, resource_name):
+        """Record that ``alias`` lives on ``resource_name``."""
+        with self._lock:
+            if self.aliases.get(alias) != resource_name:
+                self.aliases[alias] = resource_name
+                self._save()
+
+    def forget(self, alias):
+        with self._lock:
+            if self.aliases.pop(alias, None) is not None:
+                self._save()
+
+    def open(self, alias=DEFAULT_ALIAS, resource_name=None, **open_kwargs):
+        """Open the amplifier called ``alias`` and return the VISA resource.
+
+        With ``resource_name`` that port is opened and remembered for the
+        alias; binding an alias, or moving it to another port, is always this
+        explicit choice. Otherwise the port remembered for the alias is
+        opened. The SR570 only listens and cannot be identified, so no other
+        port is ever tried in its place: if the remembered port fails to
+        open, the resource list is refreshed and the port retried once, then
+        ValueError is raised.
+        """
+        open_kwargs.setdefault("write_termination", WRITE_TERMINATION)
+        with self._lock:
+            name = resource_name if resource_name is not None else self.resolve(alias)
+            if name is None:
+                raise ValueError(f"Unknown amplifier alias {alias!r}: give its resource name")
+            try:
+                instrument = self.rm.open_resource(name, **open_kwargs)
+            except Exception as e:
+                if resource_name is not None:
+                    raise ValueError(f"Could not open {name}: {e}") from e
+                print(f"Could not open {name}: {e}")
+                # a re-plugged adapter may need a fresh resource list before it opens again
+                if name not in self.list_resources(refresh=True):
+                    raise ValueError(f"{name} ({alias}) is gone: reconnect it or give the new resource name") from e
+                try:
+                    instrument = self.rm.open_resource(name, **open_kwargs)
+                except Exception as e2:
+                    raise ValueError(f"Could not open {name} ({alias}): {e2}") from e2
+            self.remember(alias, name)
+            return instrument
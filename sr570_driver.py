@@ -0,0 +1,468 @@
+"""Headless driver for the SR570 pre-amplifier.
+
+The driver has no Tk dependency. It keeps a shadow copy of every parameter
+it has sent, so a request for a setting that is already in effect does not
+go out over the serial line again.
+"""
+
+import json
+import os
+import threading
+import time
+
+# Per-user directory for caches, profiles and saved state
+CONFIG_DIR = os.environ.get("SR570_CONFIG_DIR", os.path.join(os.path.expanduser("~"), ".sr570"))
+
+# the sensitivity of the amplifier
+SENSITIVITY_MAP = {
+    0: "1 pA/V", 1: "2 pA/V", 2: "5 pA/V", 3: "10 pA/V",
+    4: "20 pA/V", 5: "50 pA/V", 6: "100 pA/V", 7: "200 pA/V",
+    8: "500 pA/V", 9: "1 nA/V", 10: "2 nA/V", 11: "5 nA/V",
+    12: "10 nA/V", 13: "20 nA/V", 14: "50 nA/V", 15: "100 nA/V",
+    16: "200 nA/V", 17: "500 nA/V", 18: "1 µA/V", 19: "2 µA/V",
+    20: "5 µA/V", 21: "10 µA/V", 22: "20 µA/V", 23: "50 µA/V",
+    24: "100 µA/V", 25: "200 µA/V", 26: "1 mA/V"
+}
+
+# Input current offset scale
+IOLV_MAP = {
+    0: "0.1 pA", 1: "0.2 pA", 2: "0.5 pA", 3: "1 pA",
+    4: "2 pA", 5: "5 pA", 6: "10 pA", 7: "20 pA",
+    8: "50 pA", 9: "0.1 nA", 10: "0.2 nA", 11: "0.5 nA",
+    12: "1 nA", 13: "2 nA", 14: "5 nA", 15: "10 nA",
+    16: "20 nA", 17: "50 nA", 18: "0.1 µA", 19: "0.2 µA",
+    20: "0.5 µA", 21: "1 µA", 22: "2 µA", 23: "5 µA",
+    24: "10 µA", 25: "20 µA", 26: "50 µA", 27: "0.1 mA",
+    28: "0.2 mA", 29: "0.5 mA"
+}
+
+# Filter type 
+FILTER_TYPE ={
+    0: "6 dB highpass", 1: "12 dB highpass", 2: "6 dB bandpass",
+    3: "6 dB lowpass", 4: "12 dB lowpass", 5: "None"
+}
+
+# Filter frequency list
+LFRQ_LIST = {  # n ranges from 0 (0.03Hz) to 15 (1 MHz) for LFRQ
+    0: "0.03 Hz", 1: "0.1 Hz", 2: "0.3 Hz", 3: "1 Hz",
+    4: "3 Hz", 5: "10 Hz", 6: "30 Hz", 7: "100 Hz",
+    8: "300 Hz", 9: "1 kHz", 10: "3 kHz", 11: "10 kHz",
+    12: "30 kHz", 13: "100 kHz", 14: "300 kHz", 15: "1 MHz"
+}
+
+HFRQ_LIST = {  # n ranges from 0 (0.03Hz) to 11 (10 kHz) for HFRQ
+    0: "0.03 Hz", 1: "0.1 Hz", 2: "0.3 Hz", 3: "1 Hz",
+    4: "3 Hz", 5: "10 Hz", 6: "30 Hz", 7: "100 Hz",
+    8: "300 Hz", 9: "1 kHz", 10: "3 kHz", 11: "10 kHz",
+}
+
+# Gain mode
+GAIN_MODE_MAP = {
+    0: "Low Noise", 1: "High Bandwidth", 2: "Low Drift"
+}
+
+# Bias voltage ON/OFF
+BIAS_ON_OFF = {
+    0: "OFF", 1: "ON"
+}
+
+# invert signal
+INVERT_SIGNAL = {
+    0: "Non-Inverted", 1: "Inverted"
+}
+
+# Blanks 
+BLANK_SIGNAL = {
+    0: "No Blank", 1: "Blank"
+}
+
+# SI prefixes used in the display strings above
+UNIT_PREFIXES = {"p": 1e-12, "n": 1e-9, "µ": 1e-6, "m": 1e-3, "": 1.0, "k": 1e3, "M": 1e6}
+
+
+def parse_quantity(text):
+    """Convert a display string such as "5 nA/V" or "0.03 Hz" to SI units."""
+    number, unit = text.split()
+    for base in ("A/V", "A", "Hz"):
+        if unit.endswith(base):
+            return float(number) * UNIT_PREFIXES[unit[:-len(base)]]
+    raise ValueError(f"Unknown unit: {text}")
+
+
+# Numeric tables derived from the maps
+SENSITIVITY_VALUES = {n: parse_quantity(text) for n, text in SENSITIVITY_MAP.items()}  # A/V
+IOLV_VALUES = {n: parse_quantity(text) for n, text in IOLV_MAP.items()}  # A
+LFRQ_VALUES = {n: parse_quantity(text) for n, text in LFRQ_LIST.items()}  # Hz
+HFRQ_VALUES = {n: parse_quantity(text) for n, text in HFRQ_LIST.items()}  # Hz
+
+
+# SR570 parameters: key -> (command, valid values)
+PARAMETERS = {
+    "sensitivity": ("SENS", SENSITIVITY_MAP),
+    "input_offset_level": ("IOLV", IOLV_MAP),
+    "input_offset_sign": ("IOSN", {0: "Negative", 1: "Positive"}),
+    "bias_state": ("BSON", BIAS_ON_OFF),
+    "bias_voltage": ("BSLV", range(-5000, 5001)),  # mV (-5.000 V ~ 5.000 V)
+    "filter_type": ("FLTT", FILTER_TYPE),
+    "low_filter_freq": ("LFRQ", LFRQ_LIST),
+    "high_filter_freq": ("HFRQ", HFRQ_LIST),
+    "gain_mode": ("GNMD", GAIN_MODE_MAP),
+    "invert_signal": ("INVT", INVERT_SIGNAL),
+    "blank_output": ("BLNK", BLANK_SIGNAL),
+}
+
+# Line terminator. The SR570 ends a command line at CR or LF, so one byte is
+# enough (pyvisa's default "\r\n" costs an extra millisecond at 9600 baud).
+WRITE_TERMINATION = "\r"
+
+# Longest frame (commands joined by ';', without terminator) sent in one write.
+# Conservative for the SR570 input buffer; raise it if your unit buffers more.
+MAX_FRAME_LENGTH = 64
+
+# Configuration pushed to the amplifier after a reset
+DEFAULT_VALUES = {
+    "sensitivity": 0,  # n=0
+    "input_offset_level": 0,  # n=0
+    "input_offset_sign": 0,  # Negative (0)
+    "bias_state": 0,  # OFF
+    "bias_voltage": 0,  # 0 mV
+    "filter_type": 5,  # None
+    "low_filter_freq": 0,  # 0.03 Hz
+    "high_filter_freq": 0,  # 0.03 Hz
+    "gain_mode": 0,  # Low Noise
+    "invert_signal": 0,  # Non-Inverted
+    "blank_output": 0,  # No Blank
+}
+
+
+def coerce_value(key, value):
+    """Return the integer argument sent for a parameter, checking its range.
+
+    Display strings from the maps (e.g. "10 nA/V" or "Low Noise") are
+    accepted as well as the 'n' value itself.
+    """
+    if key not in PARAMETERS:
+        raise KeyError(f"Unknown SR570 parameter: {key}")
+    command, choices = PARAMETERS[key]
+
+    if isinstance(value, str):
+        text = value.strip()
+        if isinstance(choices, dict):
+            for n, label in choices.items():
+                if label == text:
+                    return n
+        value = float(text)
+
+    n = int(value)
+    if n != value:
+        raise ValueError(f"{command} value {value} is not an integer.")
+    if n not in choices:
+        raise ValueError(f"{command} value {n} is out of range ({min(choices)}-{max(choices)}).")
+    return n
+
+
+def load_json(path, default=None):
+    """Read a JSON file, returning ``default`` if it is missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Write a JSON file atomically (temporary file + rename)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def pack_frames(commands, max_length=MAX_FRAME_LENGTH):
+    """Join commands with ';' into as few frames as fit in ``max_length``.
+
+    Command order is preserved. A single command longer than ``max_length``
+    still goes out in a frame of its own.
+    """
+    frames = []
+    current = ""
+    for command in commands:
+        if current and len(current) + 1 + len(command) <= max_length:
+            current += ";" + command
+        else:
+            if current:
+                frames.append(current)
+            current = command
+    if current:
+        frames.append(current)
+    return frames
+
+
+class ApplyResult:
+    """Outcome of one apply: what changed, what went over the wire and the state it left."""
+
+    def __init__(self, changes, frames, bytes_sent, state=None):
+        self.changes = changes
+        self.frames = frames
+        self.bytes_sent = bytes_sent
+        self.state = state
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def __repr__(self):
+        return (f"ApplyResult(changes={self.changes}, frames={len(self.frames)}, "
+                f"bytes_sent={self.bytes_sent})")
+
+
+class PartialApplyError(Exception):
+    """A write failed part way through a set of changes.
+
+    ``delivered`` holds the changes that reached the amplifier and are in the
+    shadow state; ``pending`` holds the ones that did not (or may not have).
+    Of those, ``invalidated`` lists the keys of the failed frame, which may
+    have reached the amplifier and are now unknown; the rest were never sent
+    and keep their previous shadow values. Applying the same values again
+    sends only ``pending``.
+    """
+
+    def __init__(self, delivered, pending, cause, invalidated=()):
+        self.delivered = delivered
+        self.pending = pending
+        self.invalidated = set(invalidated)
+        self.cause = cause
+        total = len(delivered) + len(pending)
+        super().__init__(f"{len(delivered)} of {total} settings applied, "
+                         f"not applied: {', '.join(pending)} ({cause})")
+
+
+class Batch:
+    """Collects parameter changes and sends them together.
+
+    Used as a context manager, the batch is committed on a clean exit::
+
+        with driver.batch() as batch:
+            batch.set("sensitivity", 12)
+            batch.set("filter_type", 4)
+        print(batch.result.bytes_sent)
+    """
+
+    def __init__(self, driver, force=False):
+        self.driver = driver
+        self.force = force
+        self.values = {}
+        self.result = None
+
+    def set(self, key, value):
+        """Queue one parameter change (later values for the same key win)."""
+        coerce_value(key, value)  # fail early on bad input
+        self.values[key] = value
+        return self
+
+    def update(self, values):
+        """Queue several parameter changes."""
+        for key, value in values.items():
+            self.set(key, value)
+        return self
+
+    def commit(self):
+        """Send the queued changes and return the ApplyResult."""
+        self.result = self.driver.apply(self.values, force=self.force)
+        self.values = {}
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+
+class SR570Driver:
+    """Shadow-state driver for one SR570 pre-amplifier.
+
+    ``instrument`` is any object with ``write`` and ``close`` methods, such as
+    a pyvisa resource. ``state`` holds the last value sent for each parameter,
+    or None while it is unknown (before the first write and after a reset).
+    Changes sent together are joined into as few frames as
+    ``max_frame_length`` allows.
+
+    Listeners added with ``add_listener`` are called with a dict of the
+    changes after every frame that reached the instrument (values are None
+    after a reset). They run on the thread doing the I/O, with the driver
+    locked.
+
+    Set ``metrics`` to a sr570_metrics.Metrics to record every frame write.
+    """
+
+    def __init__(self, instrument=None, max_frame_length=MAX_FRAME_LENGTH):
+        self.instrument = instrument
+        self.max_frame_length = max_frame_length
+        self.state = dict.fromkeys(PARAMETERS)
+        self.commands_sent = 0
+        self.commands_skipped = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self._listeners = []
+        self._lock = threading.RLock()
+        self.metrics = None
+
+    @property
+    def connected(self):
+        return self.instrument is not None
+
+    def add_listener(self, callback):
+        """Call ``callback(changes)`` after every change that is sent."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def _notify(self, changes):
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Error in driver listener {callback!r}: {e}")
+
+    def command(self, key, n):
+        """Format the shortest command string for one parameter, e.g. "SENS12".
+
+        The SR570 needs no space between the mnemonic and the integer argument.
+        """
+        return f"{PARAMETERS[key][0]}{n}"
+
+    def diff(self, values, force=False):
+        """Return the parameters in ``values`` that differ from the shadow state.
+
+        ``force`` is True to keep them all, or a set of the keys to keep even
+        when unchanged.
+        """
+        forced = values if force is True else (force or ())
+        changes = {}
+        for key, value in values.items():
+            n = coerce_value(key, value)
+            if key in forced or self.state[key] != n:
+                changes[key] = n
+        return changes
+
+    def set(self, key, value, force=False):
+        """Set one parameter. Returns True when a command was sent."""
+        return bool(self.apply({key: value}, force=force))
+
+    def batch(self, force=False):
+        """Return a Batch that sends its changes in as few frames as possible."""
+        return Batch(self, force=force)
+
+    def apply(self, values, force=False, order=None):
+        """Set several parameters, skipping the ones already in effect.
+
+        ``force`` is as for ``diff``. The remaining commands are joined into
+        as few frames as possible, in the order given, or in the order
+        returned by ``order(state, changes)``, which is called with the
+        driver locked (e.g. sr570_profiles.order_changes). Returns an
+        ApplyResult holding the state right after the apply.
+        """
+        with self._lock:
+            changes = self.diff(values, force=force)
+            if order is not None:
+                changes = order(self.state, changes)
+            self.commands_skipped += len(values) - len(changes)
+            frames, bytes_sent = self.send(self.compile(changes))
+            return ApplyResult(changes, frames, bytes_sent, dict(self.state))
+
+    def compile(self, changes):
+        """Pack validated changes into a list of (frame, changes-in-frame) pairs."""
+        pending = list(changes.items())
+        commands = [self.command(key, n) for key, n in pending]
+        compiled = []
+        for frame in pack_frames(commands, self.max_frame_length):
+            count = frame.count(";") + 1
+            compiled.append((frame, dict(pending[:count])))
+            del pending[:count]
+        return compiled
+
+    def send(self, compiled):
+        """Write compiled frames and update the shadow state after each one.
+
+        Returns (frames, bytes_sent). If a frame fails, PartialApplyError
+        tells which changes were delivered and which were not.
+        """
+        frames = []
+        bytes_sent = 0
+        delivered = {}
+        with self._lock:
+            if compiled and self.instrument is None:
+                raise ConnectionError("Not connected to any device.")
+            for i, (frame, changes) in enumerate(compiled):
+                try:
+                    bytes_sent += self._write(frame)
+                except Exception as e:
+                    # the frame may or may not have reached the amplifier
+                    self.invalidate(changes)
+                    self._notify(dict.fromkeys(changes))
+                    pending = {}
+                    for _, rest in compiled[i:]:
+                        pending.update(rest)
+                    raise PartialApplyError(delivered, pending, e, invalidated=changes) from e
+                delivered.update(changes)
+                self.state.update(changes)
+                self.commands_sent += len(changes)
+                self._notify(dict(changes))
+                frames.append(frame)
+        return frames, bytes_sent
+
+    def replay_frames(self):
+        """Return the frames that restore every known parameter."""
+        with self._lock:
+            commands = [self.command(key, n) for key, n in self.state.items() if n is not None]
+            return pack_frames(commands, self.max_frame_length)
+
+    def reset(self):
+        """Reset the amplifier (*RST). The shadow state becomes unknown."""
+        with self._lock:
+            self._write("*RST")
+            self.commands_sent += 1
+            self.invalidate()
+            self._notify(dict(self.state))
+
+    def invalidate(self, keys=None):
+        """Forget the cached value of ``keys`` (all parameters by default)."""
+        with self._lock:
+            for key in (keys if keys is not None else PARAMETERS):
+                self.state[key] = None
+
+    def snapshot(self):
+        """Return a copy of the shadow state."""
+        with self._lock:
+            return dict(self.state)
+
+    def close(self):
+        """Close the instrument session. The shadow state is kept."""
+        with self._lock:
+            if self.instrument is not None:
+                self.instrument.close()
+                self.instrument = None
+
+    def _write(self, frame):
+        """Write one frame and return the number of bytes it put on the wire."""
+        if self.instrument is None:
+            raise ConnectionError("Not connected to any device.")
+        start = time.perf_counter()
+        try:
+            self.instrument.write(frame)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record_write(frame, 0, time.perf_counter() - start, e)
+            raise
+        nbytes = len(frame) + len(getattr(self.instrument, "write_termination", "") or "")
+        self.frames_sent += 1
+        self.bytes_sent += nbytes
+        if self.metrics is not None:
+            self.metrics.record_write(frame, nbytes, time.perf_counter() - start)
+        return nbytes
@@ -0,0 +1,155 @@
+"""Filter planner: the fastest-settling FLTT/LFRQ/HFRQ setting that meets a target.
+
+A target is the signal bandwidth that must pass (the upper -3 dB point of
+front end plus filter), optionally the lowest signal frequency (0 for DC,
+which rules out the highpass types) and a noise budget given as the largest
+acceptable equivalent noise bandwidth (ENBW). Of the settings that meet it,
+the one with the shortest settle time (sr570_settle) is chosen.
+
+The response of every filter setting is worked out once per sensitivity and
+gain mode and kept in a table, so planning is a scan over precomputed
+numbers; the first plan for a new range takes a few tens of milliseconds.
+
+    option = plan_filter(driver.state, bandwidth=100, noise_bandwidth=500)
+    driver.apply(option.settings)
+"""
+
+import functools
+import math
+
+from sr570_driver import FILTER_TYPE, HFRQ_VALUES, LFRQ_VALUES
+from sr570_settle import FILTER_ORDERS, HIGH_BANDWIDTH, front_end_bandwidth, settle_time
+
+# Points per decade when integrating the noise bandwidth
+ENBW_POINTS_PER_DECADE = 16
+
+
+def filter_settings():
+    """Every distinct filter setting, as dicts of only the parameters it uses."""
+    settings = []
+    for filter_type in FILTER_TYPE:
+        highpass_order, lowpass_order = FILTER_ORDERS[filter_type]
+        lows = LFRQ_VALUES if lowpass_order else (None,)
+        highs = HFRQ_VALUES if highpass_order else (None,)
+        for low in lows:
+            for high in highs:
+                if low is not None and high is not None and HFRQ_VALUES[high] >= LFRQ_VALUES[low]:
+                    continue  # bandpass without a passband
+                setting = {"filter_type": filter_type}
+                if low is not None:
+                    setting["low_filter_freq"] = low
+                if high is not None:
+                    setting["high_filter_freq"] = high
+                settings.append(setting)
+    return settings
+
+
+FILTER_SETTINGS = filter_settings()
+
+
+class FilterOption:
+    """One filter setting with its response at a given sensitivity and gain mode."""
+
+    def __init__(self, settings, bandwidth, low_corner, noise_bandwidth, settle_time):
+        self.settings = settings  # parameter -> 'n' value, only the ones the filter uses
+        self.bandwidth = bandwidth  # upper -3 dB point (Hz)
+        self.low_corner = low_corner  # lower -3 dB point (Hz), 0 without highpass
+        self.noise_bandwidth = noise_bandwidth  # ENBW (Hz)
+        self.settle_time = settle_time  # s
+
+    def __repr__(self):
+        return (f"FilterOption({self.settings}, bandwidth={self.bandwidth:.3g} Hz, "
+                f"low_corner={self.low_corner:.3g} Hz, noise_bandwidth={self.noise_bandwidth:.3g} Hz, "
+                f"settle_time={self.settle_time:.3g} s)")
+
+
+def power_gain(f, front_end, lowpass_order, lowpass, highpass_order, highpass):
+    """|H(f)|^2 of the front-end pole followed by the filter."""
+    gain = 1.0 / (1.0 + (f / front_end) ** 2)
+    if lowpass_order:
+        gain /= (1.0 + (f / lowpass) ** 2) ** lowpass_order
+    if highpass_order:
+        x = (f / highpass) ** 2
+        gain *= (x / (1.0 + x)) ** highpass_order
+    return gain
+
+
+def half_power_point(gain, lo, hi):
+    """Frequency between ``lo`` and ``hi`` where ``gain`` crosses 1/2 (log bisection)."""
+    rising = gain(lo) < gain(hi)
+    for _ in range(30):  # 1e6 span -> 1e-8 relative
+        mid = math.sqrt(lo * hi)
+        if (gain(mid) < 0.5) == rising:
+            lo = mid
+        else:
+            hi = mid
+    return math.sqrt(lo * hi)
+
+
+def analyse(setting, front_end, state):
+    """Return the FilterOption of ``setting``, or None if it passes nothing."""
+    highpass_order, lowpass_order = FILTER_ORDERS[setting["filter_type"]]
+    lowpass = LFRQ_VALUES[setting["low_filter_freq"]] if lowpass_order else math.inf
+    highpass = HFRQ_VALUES[setting["high_filter_freq"]] if highpass_order else 0.0
+
+    def gain(f):
+        return power_gain(f, front_end, lowpass_order, lowpass, highpass_order, highpass)
+
+    top = min(front_end, lowpass)
+    centre = math.sqrt(top * highpass) if highpass_order else top / 1e3
+    if gain(centre) < 0.5:
+        return None
+    bandwidth = half_power_point(gain, centre, top * 1e3)
+    low_corner = half_power_point(gain, highpass / 1e3, centre) if highpass_order else 0.0
+
+    # ENBW = integral of |H|^2 df, on a log grid: df = f dln(f)
+    start = (highpass if highpass_order else bandwidth) / 1e4
+    decades = math.log10(bandwidth * 1e4 / start)
+    steps = int(decades * ENBW_POINTS_PER_DECADE)
+    step = decades / steps * math.log(10)
+    noise_bandwidth = start  # below the grid |H|^2 <= 1
+    for i in range(steps + 1):
+        f = start * math.exp(i * step)
+        noise_bandwidth += gain(f) * f * step * (0.5 if i in (0, steps) else 1.0)
+
+    return FilterOption(setting, bandwidth, low_corner, noise_bandwidth, settle_time({**state, **setting}))
+
+
+@functools.lru_cache(maxsize=None)
+def filter_table(sensitivity, gain_mode):
+    """FilterOptions of every filter setting at ``sensitivity`` and ``gain_mode``."""
+    front_end = front_end_bandwidth(sensitivity, gain_mode)
+    state = {"sensitivity": sensitivity, "gain_mode": gain_mode}
+    options = (analyse(setting, front_end, state) for setting in FILTER_SETTINGS)
+    return tuple(option for option in options if option is not None)
+
+
+def plan_filter(state, bandwidth=None, noise_bandwidth=None, min_frequency=0.0):
+    """Return the fastest-settling FilterOption that meets the target.
+
+    ``state`` supplies the sensitivity and gain mode (a shadow-state dict).
+    ``bandwidth`` is the highest signal frequency that must pass (Hz),
+    ``min_frequency`` the lowest (0 = DC) and ``noise_bandwidth`` the largest
+    acceptable ENBW (Hz). Raises ValueError if no setting meets the target.
+    """
+    sensitivity, gain_mode = state.get("sensitivity"), state.get("gain_mode")
+    if sensitivity is None or gain_mode is None:
+        raise ValueError("Sensitivity and gain mode must be known to plan a filter")
+    # Low Noise and Low Drift share a front end
+    gain_mode = HIGH_BANDWIDTH if gain_mode == HIGH_BANDWIDTH else 0
+
+    best = None
+    for option in filter_table(sensitivity, gain_mode):
+        if bandwidth is not None and option.bandwidth < bandwidth:
+            continue
+        if option.low_corner > min_frequency:
+            continue
+        if noise_bandwidth is not None and option.noise_bandwidth > noise_bandwidth:
+            continue
+        if best is None or (option.settle_time, option.noise_bandwidth) < (best.settle_time, best.noise_bandwidth):
+            best = option
+    if best is None:
+        front_end = front_end_bandwidth(sensitivity, gain_mode)
+        raise ValueError(f"No filter setting meets the target (front end limited to {front_end:.3g} Hz "
+                         f"at this sensitivity and gain mode)")
+    return best
@@ -0,0 +1,253 @@
+"""Run the SR570 driver in its own process, with the settings in shared memory.
+
+An acquisition program that drives the amplifier in-process shares the GIL
+between its DAQ threads and the blocking serial writes. InstrumentHost
+moves the driver (with its supervised connection and settle tracking) into
+a child process. Commands go to it over a multiprocessing queue; the
+current settings come back through a shared-memory block that the host
+rewrites after every frame under a sequence lock, so readers never lock,
+wait for the host or do IPC:
+
+    host = InstrumentHost(alias="I0").start()
+    host.apply({"sensitivity": 12})           # runs in the host process
+    sensitivity = host.state.read("sensitivity")   # DAQ loop: well under a microsecond
+    amps_per_volt = host.state.sensitivity_value()
+
+Other processes can attach to the same block with SharedState(host.shm_name).
+A reader that finds the sequence number odd, or changed while it copied,
+simply copies again; the single writer never waits for readers.
+"""
+
+import multiprocessing as mp
+import queue
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from sr570_discovery import DEFAULT_ALIAS
+from sr570_driver import DEFAULT_VALUES, PARAMETERS, SENSITIVITY_VALUES, SR570Driver
+
+# Block layout: sequence number, ready_at (monotonic s), connected flag, one int32 per parameter
+SEQUENCE = struct.Struct("<Q")
+BODY = struct.Struct("<di" + "i" * len(PARAMETERS))
+BLOCK_SIZE = SEQUENCE.size + BODY.size
+INT32 = struct.Struct("<i")
+UNKNOWN = -2 ** 31  # stored for a parameter whose value is not known
+
+PARAMETER_OFFSETS = {key: SEQUENCE.size + struct.calcsize("<di") + INT32.size * i for i, key in enumerate(PARAMETERS)}
+
+
+class HostError(RuntimeError):
+    """An operation failed in the instrument host process."""
+
+
+class SharedState:
+    """Lock-free reader (and, in the host, the writer) of the shared settings block.
+
+    ``track`` (default: ``create``) leaves the block registered with this
+    process's resource tracker, which unlinks it when its processes exit. A
+    reader in another program must not be tracked, or its exit would remove
+    the block from under the host; the host process shares its creator's
+    tracker and is.
+    """
+
+    def __init__(self, name=None, create=False, track=None):
+        size = BLOCK_SIZE if create else 0
+        if track is None:
+            track = create
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, create=create, size=size, track=track)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            if not track:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.buf = self.shm.buf
+        if create:
+            self.publish(dict.fromkeys(PARAMETERS), False, 0.0)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, state, connected, ready_at):
+        """Writer side: replace the block contents (host process only)."""
+        sequence = SEQUENCE.unpack_from(self.buf)[0] + 1
+        SEQUENCE.pack_into(self.buf, 0, sequence)  # odd: readers retry
+        values = [UNKNOWN if state[key] is None else state[key] for key in PARAMETERS]
+        BODY.pack_into(self.buf, SEQUENCE.size, ready_at, int(connected), *values)
+        SEQUENCE.pack_into(self.buf, 0, sequence + 1)
+
+    def read(self, key):
+        """Return the current value of one parameter (None if unknown)."""
+        buf, offset = self.buf, PARAMETER_OFFSETS[key]
+        while True:
+            sequence = SEQUENCE.unpack_from(buf)[0]
+            value = INT32.unpack_from(buf, offset)[0]
+            if not sequence & 1 and SEQUENCE.unpack_from(buf)[0] == sequence:
+                return None if value == UNKNOWN else value
+
+    def snapshot(self):
+        """Return (state dict, connected, ready_at) as one consistent copy."""
+        buf = self.buf
+        while True:
+            sequence = SEQUENCE.unpack_from(buf)[0]
+            ready_at, connected, *values = BODY.unpack_from(buf, SEQUENCE.size)
+            if not sequence & 1 and SEQUENCE.unpack_from(buf)[0] == sequence:
+                break
+        state = {key: None if value == UNKNOWN else value for key, value in zip(PARAMETERS, values)}
+        return state, bool(connected), ready_at
+
+    def sensitivity_value(self):
+        """Current sensitivity in A/V, or None if unknown."""
+        n = self.read("sensitivity")
+        return None if n is None else SENSITIVITY_VALUES[n]
+
+    def settled(self):
+        """True once the output has settled after the last change (see sr570_settle)."""
+        return time.monotonic() >= self.snapshot()[2]
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def host_main(shm_name, commands, replies, alias, resource_name, backend):
+    """Body of the host process: execute commands and publish the state after every frame."""
+    from sr570_connection import open_amplifier
+    from sr570_discovery import ResourceDiscovery, open_resource_manager
+    from sr570_profiles import order_changes
+    from sr570_settle import SettleTracker
+
+    shared = SharedState(shm_name, track=True)  # a multiprocessing child shares the creator's tracker
+    driver = SR570Driver()
+    tracker = SettleTracker(driver)
+
+    def publish(_changes=None):
+        shared.publish(driver.snapshot(), driver.connected, tracker.ready_at)
+
+    driver.add_listener(publish)  # after the tracker, so ready_at is already updated
+    discovery = None
+
+    def connect():
+        nonlocal discovery
+        if discovery is None:
+            discovery = ResourceDiscovery(open_resource_manager(backend))
+        open_amplifier(driver, lambda: discovery.open(alias, resource_name), DEFAULT_VALUES)
+
+    handlers = {
+        "apply": lambda values, force=False: driver.apply(values, force=force, order=order_changes).changes,
+        "reset": driver.reset,
+        "connect": connect,
+        "close": driver.close,
+    }
+    try:
+        try:
+            connect()
+        except Exception as e:
+            print(f"SR570 host could not connect: {e}")
+        publish()
+        while True:
+            request_id, name, args = commands.get()
+            if name == "stop":
+                break
+            try:
+                result, error = handlers[name](*args), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+                if request_id is None:
+                    print(f"SR570 host: {name} failed: {error}")
+            publish()
+            if request_id is not None:
+                replies.put((request_id, result, error))
+    finally:
+        driver.close()
+        publish()
+        shared.close()
+
+
+class InstrumentHost:
+    """Starts the host process and sends it commands."""
+
+    def __init__(self, alias=DEFAULT_ALIAS, resource_name=None, backend=None, timeout=10.0):
+        self.alias = alias
+        self.resource_name = resource_name
+        self.backend = backend
+        self.timeout = timeout
+        self.state = None
+        self.process = None
+        self._context = mp.get_context("spawn")  # no forked copies of the DAQ process
+        self._commands = self._context.Queue()
+        self._replies = self._context.Queue()
+        self._next_id = 0
+        self._call_lock = threading.Lock()  # one round trip at a time
+
+    @property
+    def shm_name(self):
+        return self.state.name
+
+    def start(self):
+        self.state = SharedState(create=True)
+        self.process = self._context.Process(
+            target=host_main, name="sr570-host", daemon=True,
+            args=(self.state.name, self._commands, self._replies, self.alias, self.resource_name, self.backend),
+        )
+        self.process.start()
+        return self
+
+    def call(self, name, *args, wait=True):
+        """Run a command in the host. With ``wait`` return its result or raise HostError."""
+        if not wait:
+            self._commands.put((None, name, args))
+            return None
+        with self._call_lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._commands.put((request_id, name, args))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    reply_id, result, error = self._replies.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise HostError(f"No reply to {name} within {self.timeout} s") from None
+                if reply_id == request_id:
+                    break  # replies to earlier calls that timed out are dropped
+        if error is not None:
+            raise HostError(error)
+        return result
+
+    def apply(self, values, force=False, wait=True):
+        """Apply settings in the host, in a safe order. Returns the changes sent (with ``wait``)."""
+        return self.call("apply", values, force, wait=wait)
+
+    def set(self, key, value, force=False, wait=True):
+        return self.apply({key: value}, force, wait)
+
+    def reset(self):
+        return self.call("reset")
+
+    def connect(self):
+        return self.call("connect")
+
+    def stop(self):
+        """Stop the host process (the amplifier keeps its settings) and free the block."""
+        if self.process is not None:
+            self._commands.put((None, "stop", ()))
+            self.process.join(self.timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+        if self.state is not None:
+            self.state.close()
+            try:
+                self.state.shm.unlink()
+            except FileNotFoundError:
+                pass  # already unlinked, e.g. by a resource tracker
+            self.state = None
+
+    def __enter__(self):
+        return self.start() if self.process is None else self
+
+    def __exit__(self, *exc):
+        self.stop()
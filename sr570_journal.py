@@ -0,0 +1,208 @@
+"""Append-only binary journal of every setting the controller sends.
+
+Each change is one fixed-size record with monotonic and wall-clock
+timestamps, so offline data reduction can ask what gain, offset or filter
+was in effect at any time. Every ``checkpoint_interval`` changes the full
+state is written as well; a lookup is then a binary search on the
+timestamps plus a backward scan that never passes more than one checkpoint,
+i.e. O(log n). JournalReader reads the file through a memory map, so even a
+day-long journal opens instantly.
+
+    journal = JournalWriter("beamtime.sr570j")
+    journal.attach(driver)
+    ...
+    with JournalReader("beamtime.sr570j") as reader:
+        gain = reader.value_at("sensitivity", frame_time, clock="wall")
+
+File layout: a 16-byte header (magic, version, record size) followed by
+24-byte records: monotonic ns (int64), wall-clock ns (int64), parameter
+code (uint8, index into PARAMETERS), kind (uint8), 2 pad bytes, value
+(int32). Wall-clock lookups assume the system clock did not step backwards
+while the journal was written.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+from sr570_driver import PARAMETERS
+
+MAGIC = b"SR570JNL"
+VERSION = 1
+HEADER = struct.Struct("<8sHH4x")
+RECORD = struct.Struct("<qqBBxxi")
+
+KEYS = list(PARAMETERS)  # parameter code -> key
+CODES = {key: code for code, key in enumerate(KEYS)}
+
+KIND_CHANGE = 0
+KIND_CHECKPOINT = 1
+
+# Stored value for a parameter that became unknown (e.g. after *RST)
+UNKNOWN = -2 ** 31
+
+CHECKPOINT_INTERVAL = 256
+
+
+class JournalWriter:
+    """Appends setting changes to a journal file."""
+
+    def __init__(self, path, checkpoint_interval=CHECKPOINT_INTERVAL, sync=False):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.sync = sync
+        self._since_checkpoint = 0
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size:
+            with open(path, "rb") as f:
+                check_header(f.read(HEADER.size))
+            # drop a record cut short by a crash
+            extra = (size - HEADER.size) % RECORD.size
+            if extra:
+                with open(path, "r+b") as f:
+                    f.truncate(size - extra)
+        self._file = open(path, "ab")
+        if not size:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._file.flush()
+
+    def attach(self, driver):
+        """Record every change ``driver`` sends, starting with its current state."""
+        self.checkpoint(driver.state)
+        driver.add_listener(lambda changes: self.record(changes, driver.state))
+
+    def record(self, changes, state=None):
+        """Append change records; add a checkpoint of ``state`` when one is due."""
+        mono, wall = time.monotonic_ns(), time.time_ns()
+        self._append(mono, wall, changes, KIND_CHANGE)
+        self._since_checkpoint += len(changes)
+        if state is not None and self._since_checkpoint >= self.checkpoint_interval:
+            self._append(mono, wall, state, KIND_CHECKPOINT)
+            self._since_checkpoint = 0
+
+    def checkpoint(self, state):
+        """Append the full state."""
+        self._append(time.monotonic_ns(), time.time_ns(), state, KIND_CHECKPOINT)
+        self._since_checkpoint = 0
+
+    def _append(self, mono, wall, values, kind):
+        data = b"".join(
+            RECORD.pack(mono, wall, CODES[key], kind, UNKNOWN if value is None else value)
+            for key, value in values.items()
+        )
+        self._file.write(data)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def check_header(data):
+    if len(data) < HEADER.size:
+        raise ValueError("Not an SR570 journal (file too short)")
+    magic, version, record_size = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError("Not an SR570 journal")
+    if version != VERSION:
+        raise ValueError(f"Unsupported journal version {version}")
+
+
+class JournalReader:
+    """Memory-mapped, read-only view of a journal with time-indexed lookups.
+
+    Times are in seconds on the clock named by ``clock``: "monotonic"
+    (``time.monotonic()`` of the writing process) or "wall" (``time.time()``).
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = None
+        self.refresh()
+
+    def refresh(self):
+        """Pick up records appended since the journal was opened."""
+        if self._map is not None:
+            self._map.close()
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        check_header(self._map[:HEADER.size])
+        self._count = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def record(self, i):
+        """Return record ``i`` as (monotonic_s, wall_s, key, kind, value)."""
+        mono, wall, code, kind, value = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+        return mono / 1e9, wall / 1e9, KEYS[code], kind, None if value == UNKNOWN else value
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.record(i)
+
+    def _time_ns(self, i, field):
+        return struct.unpack_from("<q", self._map, HEADER.size + i * RECORD.size + 8 * field)[0]
+
+    def bisect(self, t, clock="monotonic"):
+        """Return the number of records written at or before time ``t``."""
+        field = {"monotonic": 0, "wall": 1}[clock]
+        t_ns = round(t * 1e9)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_ns(mid, field) <= t_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def state_at(self, t, clock="monotonic"):
+        """Return the settings in effect at time ``t`` (None where unknown)."""
+        state = {}
+        i = self.bisect(t, clock)
+        while i > 0 and len(state) < len(KEYS):
+            i -= 1
+            _, _, key, _, value = self.record(i)
+            state.setdefault(key, value)
+        return {key: state.get(key) for key in KEYS}
+
+    def value_at(self, key, t, clock="monotonic"):
+        """Return one setting in effect at time ``t``."""
+        i = self.bisect(t, clock)
+        while i > 0:
+            i -= 1
+            _, _, record_key, kind, value = self.record(i)
+            if record_key == key:
+                return value
+        return None
+
+    def series(self, key, clock="monotonic"):
+        """Return (times, values) of every record for ``key``, for ``expand_setting``."""
+        times, values = [], []
+        for mono, wall, record_key, kind, value in self:
+            if record_key == key:
+                times.append(mono if clock == "monotonic" else wall)
+                values.append(value)
+        return times, values
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
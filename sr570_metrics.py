@@ -0,0 +1,229 @@
+"""Counters, latency histograms and tracing for the serial write path.
+
+A Metrics object is installed on the pieces that do I/O:
+
+    metrics = Metrics(trace=True)
+    driver.metrics = metrics          # every frame: command counts, bytes, latency, errors
+    worker.metrics = metrics          # GUI click -> serial write latency
+    MetricsServer(metrics, port=9570).start()
+    ...
+    metrics.write_trace("session.trace.json")
+
+SupervisedConnection picks the metrics up from its driver and records
+retries and reconnects. ``render()`` gives the Prometheus text format that
+MetricsServer serves on ``/metrics``; ``write_trace`` saves the recorded
+spans as Chrome trace JSON (open in chrome://tracing or Perfetto), which
+shows whether the time goes to the serial port or to the code around it.
+"""
+
+import collections
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sr570_connection import classify_error
+
+# Histogram bucket upper bounds in seconds (a 9600-baud frame takes 1-70 ms)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+# Longest Chrome trace kept in memory (oldest events are dropped)
+MAX_TRACE_EVENTS = 100000
+
+DEFAULT_METRICS_PORT = 9570
+
+COMMAND_PATTERN = re.compile(r"\*?[A-Z]+")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def render(self, name, help_text):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:.9g}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+def render_counter(name, help_text, values):
+    """Prometheus lines for a counter; ``values`` maps a label string (or "") to a count."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{labels} {value}")
+    return lines
+
+
+class Metrics:
+    """Thread-safe collection of SR570 I/O metrics, with an optional trace."""
+
+    def __init__(self, trace=False, max_trace_events=MAX_TRACE_EVENTS):
+        self._lock = threading.Lock()
+        self.commands = collections.Counter()  # command name -> commands written
+        self.errors = collections.Counter()  # error kind -> failed writes
+        self.frames = 0
+        self.bytes_sent = 0
+        self.retries = 0
+        self.reconnects = 0
+        self.write_latency = Histogram()
+        self.reconnect_latency = Histogram()
+        self.click_to_write = Histogram()
+        self.queue_wait = Histogram()
+        self.trace = collections.deque(maxlen=max_trace_events) if trace else None
+        self._t0 = time.perf_counter()
+
+    def record_write(self, frame, nbytes, seconds, error=None):
+        """Called by the driver after every frame write (``error`` set if it failed)."""
+        with self._lock:
+            if error is None:
+                self.frames += 1
+                self.bytes_sent += nbytes
+                self.commands.update(command_name(c) for c in frame.split(";"))
+            else:
+                self.errors[error_kind(error)] += 1
+            self.write_latency.observe(seconds)
+            self._span("write", seconds, frame=frame, error=None if error is None else str(error))
+
+    def record_retry(self, error):
+        """Called when a failed write is re-sent.
+
+        The failure is not a write error: only a frame that finally fails is
+        counted, once, by ``record_write``.
+        """
+        with self._lock:
+            self.retries += 1
+            self._instant("retry", error=str(error))
+
+    def record_reconnect(self, seconds):
+        with self._lock:
+            self.reconnects += 1
+            self.reconnect_latency.observe(seconds)
+            self._span("reconnect", seconds)
+
+    def record_job(self, name, waited, seconds):
+        """Called by IOWorker: ``waited`` in the queue, then ran for ``seconds``."""
+        with self._lock:
+            self.queue_wait.observe(waited)
+            self.click_to_write.observe(waited + seconds)
+            self._span(name, seconds)
+
+    def _span(self, name, seconds, **args):
+        if self.trace is not None:
+            end = time.perf_counter() - self._t0
+            self.trace.append({
+                "name": name, "ph": "X", "ts": (end - seconds) * 1e6, "dur": seconds * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+            })
+
+    def _instant(self, name, **args):
+        if self.trace is not None:
+            self.trace.append({
+                "name": name, "ph": "i", "s": "t", "ts": (time.perf_counter() - self._t0) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+            })
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            lines += render_counter("sr570_commands_total", "Commands written, by command.",
+                                    {f'{{command="{c}"}}': n for c, n in self.commands.items()})
+            lines += render_counter("sr570_frames_total", "Frames written.", {"": self.frames})
+            lines += render_counter("sr570_bytes_sent_total", "Bytes put on the wire.", {"": self.bytes_sent})
+            lines += render_counter("sr570_write_errors_total", "Failed frame writes, by error kind.",
+                                    {f'{{kind="{k}"}}': n for k, n in self.errors.items()})
+            lines += render_counter("sr570_retries_total", "Writes retried after an error.", {"": self.retries})
+            lines += render_counter("sr570_reconnects_total", "Successful reconnects.", {"": self.reconnects})
+            lines += self.write_latency.render("sr570_write_seconds", "Time to write one frame.")
+            lines += self.reconnect_latency.render("sr570_reconnect_seconds",
+                                                   "Time from link loss to replayed state.")
+            lines += self.click_to_write.render("sr570_click_to_write_seconds",
+                                                "Time from a GUI action to the end of its I/O.")
+            lines += self.queue_wait.render("sr570_io_queue_wait_seconds",
+                                            "Time a GUI action waited for the I/O thread.")
+            return "\n".join(lines) + "\n"
+
+    def write_trace(self, path):
+        """Save the recorded spans as Chrome trace JSON."""
+        if self.trace is None:
+            raise ValueError("Tracing is not enabled (Metrics(trace=True))")
+        with self._lock:
+            events = list(self.trace)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def command_name(command):
+    """Return the mnemonic of one command, e.g. "SENS" for "SENS12"."""
+    match = COMMAND_PATTERN.match(command.strip())
+    return match.group(0) if match else "?"
+
+
+def error_kind(exc):
+    """Error label: the link error class ("timeout", "io", "closed") or the exception type."""
+    return classify_error(exc) or type(exc).__name__
+
+
+class MetricsServer:
+    """Serves ``metrics.render()`` on http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+        self.metrics = metrics
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="sr570-metrics", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,98 @@
+"""Observable copy of the shadow state for Tk widgets.
+
+Widgets subscribe to the parameters they show. Changes are collected and
+rendered once per idle cycle with ``after_idle``, so a burst of changes (a
+profile switch, a remote client, an autorange) costs one redraw per
+subscriber instead of one Tk call per parameter and label.
+
+Driver listeners run on the I/O thread, where Tk must not be called; their
+changes are queued and picked up on the Tk thread every ``poll_ms``.
+
+    model = StateModel(root)
+    model.attach(driver)
+    model.subscribe("sensitivity", lambda state: label.config(text=SENSITIVITY_MAP.get(state["sensitivity"])))
+"""
+
+import threading
+
+from sr570_driver import PARAMETERS
+
+
+class StateModel:
+    """Shadow state mirrored on the Tk thread, with coalesced redraws."""
+
+    def __init__(self, root, poll_ms=15):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.state = dict.fromkeys(PARAMETERS)
+        self.renders = 0  # idle cycles that redrew something
+        self._subscribers = []  # (keys, callback)
+        self._dirty = set()
+        self._render_scheduled = False
+        self._incoming = {}
+        self._incoming_lock = threading.Lock()
+        self._polling = False
+
+    def attach(self, driver):
+        """Follow ``driver``: take its current state and every later change."""
+        self.update(driver.snapshot())
+        driver.add_listener(self.post)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def subscribe(self, keys, callback):
+        """Call ``callback(state)`` on the Tk thread whenever one of ``keys`` changes.
+
+        ``keys`` is a parameter name or a tuple of them. The callback runs at
+        most once per idle cycle, however many of its keys changed.
+        """
+        keys = (keys,) if isinstance(keys, str) else tuple(keys)
+        self._subscribers.append((keys, callback))
+        callback(self.state)
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(keys, cb) for keys, cb in self._subscribers if cb is not callback]
+
+    def post(self, changes):
+        """Queue changes from any thread."""
+        with self._incoming_lock:
+            self._incoming.update(changes)
+
+    def update(self, changes):
+        """Apply changes on the Tk thread and schedule a redraw."""
+        for key, value in changes.items():
+            if self.state.get(key) != value or value is None:
+                self.state[key] = value
+                self._dirty.add(key)
+        self._schedule()
+
+    def refresh(self):
+        """Redraw every subscriber on the next idle cycle."""
+        self._dirty.update(PARAMETERS)
+        self._schedule()
+
+    def _schedule(self):
+        if self._dirty and not self._render_scheduled:
+            self._render_scheduled = True
+            self.root.after_idle(self._render)
+
+    def _poll(self):
+        with self._incoming_lock:
+            changes, self._incoming = self._incoming, {}
+        if changes:
+            self.update(changes)
+        self.root.after(self.poll_ms, self._poll)
+
+    def _render(self):
+        self._render_scheduled = False
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        self.renders += 1
+        for keys, callback in list(self._subscribers):
+            if dirty.intersection(keys):
+                try:
+                    callback(self.state)
+                except Exception as e:
+                    print(f"Error in state model subscriber {callback!r}: {e}")
@@ -0,0 +1,157 @@
+"""Automatic input-offset nulling with IOLV and IOSN.
+
+``measure()`` returns the amplifier output voltage, as for Autorange. With
+the output taken as V = inv * (I + offset) / S (see sr570_convert), one
+reading at a known offset gives the dark current directly, so the best
+IOLV/IOSN pair is computed, not searched for: usually one write and two
+readings. Only while the output is overloaded is the sign of the reading
+all that is known; the signed offsets are then bisected, which needs at
+most six writes for the 60 combinations.
+
+Results are cached per amplifier alias and sensitivity in
+CONFIG_DIR/offsets.json, so the next run starts from the cached pair and
+normally only confirms it with a single reading.
+
+The input offset current only acts when it is switched on at the amplifier
+(IOON); the nuller does not switch it. The driver cannot tell whether it is
+on, so a run checks that the output follows each offset change and fails,
+caching nothing, when it does not.
+
+    nuller = OffsetNuller(driver, measure=daq.read_output, alias="I0", tracker=tracker)
+    level, sign = nuller.run()
+"""
+
+import os
+import threading
+import time
+
+from sr570_autorange import OUTPUT_FULL_SCALE
+from sr570_discovery import DEFAULT_ALIAS
+from sr570_driver import CONFIG_DIR, IOLV_VALUES, SENSITIVITY_VALUES, load_json, save_json
+from sr570_profiles import apply_profile
+
+OFFSETS_FILE = os.path.join(CONFIG_DIR, "offsets.json")
+
+# Every offset the amplifier can add, in ascending order: (current in A, IOLV, IOSN)
+OFFSETS = sorted([(-IOLV_VALUES[n], n, 0) for n in IOLV_VALUES] + [(IOLV_VALUES[n], n, 1) for n in IOLV_VALUES])
+OFFSET_INDEX = {(level, sign): i for i, (_, level, sign) in enumerate(OFFSETS)}
+
+
+def nearest_offset(current):
+    """Index in OFFSETS of the offset closest to ``current`` (A)."""
+    return min(range(len(OFFSETS)), key=lambda i: abs(OFFSETS[i][0] - current))
+
+
+class OffsetCache:
+    """Nulling results persisted as {alias: {sensitivity: {level, sign, residual}}}."""
+
+    def __init__(self, path=OFFSETS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.offsets = dict(load_json(path, {}) or {})
+
+    def get(self, alias, sensitivity):
+        """Return the cached (level, sign) pair, or None."""
+        entry = self.offsets.get(alias, {}).get(str(sensitivity))
+        if entry is None:
+            return None
+        return entry["input_offset_level"], entry["input_offset_sign"]
+
+    def save(self, alias, sensitivity, level, sign, residual):
+        with self._lock:
+            self.offsets.setdefault(alias, {})[str(sensitivity)] = {
+                "input_offset_level": level, "input_offset_sign": sign, "residual": residual,
+            }
+            save_json(self.path, self.offsets)
+
+    def forget(self, alias):
+        with self._lock:
+            if self.offsets.pop(alias, None) is not None:
+                save_json(self.path, self.offsets)
+
+
+class OffsetNuller:
+    """Finds the IOLV/IOSN pair that minimizes the residual output of one amplifier."""
+
+    def __init__(self, driver, measure, alias=DEFAULT_ALIAS, cache=None, full_scale=OUTPUT_FULL_SCALE,
+                 settle=0.05, sleep=time.sleep, tracker=None):
+        self.driver = driver
+        self.measure = measure
+        self.alias = alias
+        self.cache = cache if cache is not None else OffsetCache()
+        self.full_scale = full_scale
+        self.settle = settle
+        self.sleep = sleep
+        self.tracker = tracker  # SettleTracker, if given, decides how long an offset change takes
+        self.writes = 0
+        self.measurements = 0
+        self.residual = None  # input-referred residual current (A) at the chosen offset
+
+    def set_offset(self, index):
+        _, level, sign = OFFSETS[index]
+        if not apply_profile(self.driver, {"input_offset_level": level, "input_offset_sign": sign}):
+            return
+        self.writes += 1
+        if self.tracker is None:
+            self.sleep(self.settle)
+        else:
+            self.tracker.wait_settled()
+
+    def current_index(self):
+        state = self.driver.state
+        return OFFSET_INDEX.get((state["input_offset_level"], state["input_offset_sign"]))
+
+    def run(self, max_writes=8):
+        """Null the output at the present sensitivity. Returns (level, sign).
+
+        Raises ValueError if the sensitivity is unknown, no offset brings
+        the output out of overload, or the output does not follow the offset
+        (IOON off).
+        """
+        sensitivity = self.driver.state["sensitivity"]
+        if sensitivity is None:
+            raise ValueError("Sensitivity unknown: set it before nulling the offset")
+        scale = SENSITIVITY_VALUES[sensitivity] * (-1 if self.driver.state["invert_signal"] == 1 else 1)
+
+        cached = self.cache.get(self.alias, sensitivity)
+        if cached is not None and cached in OFFSET_INDEX:
+            self.set_offset(OFFSET_INDEX[cached])
+        elif self.current_index() is None:
+            self.set_offset(OFFSET_INDEX[(0, 1)])  # smallest offset: as good as none
+
+        lo, hi = 0, len(OFFSETS) - 1  # offsets not yet ruled out while overloaded
+        residuals = {}  # offset index -> measured residual current (A)
+        previous = None  # index of the last reading that was not overloaded
+        while True:
+            i = self.current_index()
+            voltage = self.measure()
+            self.measurements += 1
+            if abs(voltage) >= self.full_scale:
+                # only the sign is known: a positive residual needs a smaller offset
+                if voltage * scale > 0:
+                    hi = i - 1
+                else:
+                    lo = i + 1
+                if lo > hi or self.writes >= max_writes:
+                    raise ValueError("Output stays overloaded at every offset: choose a less sensitive range")
+                best = (lo + hi) // 2
+            else:
+                residuals[i] = voltage * scale
+                if previous is not None and previous != i:
+                    # the residual must move by about as much as the offset did
+                    expected = OFFSETS[i][0] - OFFSETS[previous][0]
+                    if abs(residuals[i] - residuals[previous]) < abs(expected) / 2:
+                        raise ValueError("Output does not follow the input offset: switch it on (IOON) first")
+                previous = i
+                best = nearest_offset(OFFSETS[i][0] - residuals[i])
+                if best == i or best in residuals or self.writes >= max_writes:
+                    # converged, or the amplifier disagrees with the model: keep the best seen
+                    best = min(residuals, key=lambda k: abs(residuals[k]))
+                    self.set_offset(best)
+                    break
+            self.set_offset(best)
+
+        _, level, sign = OFFSETS[best]
+        self.residual = residuals[best]
+        self.cache.save(self.alias, sensitivity, level, sign, self.residual)
+        return level, sign
@@ -0,0 +1,104 @@
+"""Crash-safe persistence of the shadow state, for resuming without a reset.
+
+StatePersister saves the driver's shadow state to
+CONFIG_DIR/state-<alias>.json after changes. Saves are debounced: a burst of
+changes (a profile switch, a scan) is written once, ``delay`` seconds after
+its first change, from a timer thread, so the I/O thread never waits for the
+disk. Every save is atomic (save_json), so a crash leaves the previous
+complete file, never a torn one.
+
+After a restart, ``load_state`` returns the saved settings. With them in
+the shadow state, ``open_amplifier`` does not reset the amplifier: it
+re-asserts them in one batch, or with ``replay=False`` writes nothing.
+
+    saved = load_state("I0")
+    if saved:
+        driver.state.update(saved)
+    StatePersister("I0").attach(driver)
+"""
+
+import os
+import threading
+import time
+
+from sr570_discovery import DEFAULT_ALIAS
+from sr570_driver import CONFIG_DIR, PARAMETERS, coerce_value, load_json, save_json
+
+# Seconds between the first change of a burst and its save
+SAVE_DELAY = 0.2
+
+
+def state_path(alias=DEFAULT_ALIAS):
+    return os.path.join(CONFIG_DIR, f"state-{alias}.json")
+
+
+def load_state(alias=DEFAULT_ALIAS, path=None):
+    """Return the saved shadow state of ``alias`` (unknown values as None), or None."""
+    saved = load_json(path or state_path(alias))
+    if not isinstance(saved, dict) or not isinstance(saved.get("state"), dict):
+        return None
+    state = dict.fromkeys(PARAMETERS)
+    for key, value in saved["state"].items():
+        if key in PARAMETERS and value is not None:
+            try:
+                state[key] = coerce_value(key, value)
+            except ValueError as e:
+                print(f"Ignoring saved {key}: {e}")
+    return state
+
+
+class StatePersister:
+    """Saves a driver's shadow state, debounced, whenever it changes."""
+
+    def __init__(self, alias=DEFAULT_ALIAS, path=None, delay=SAVE_DELAY):
+        self.alias = alias
+        self.path = path or state_path(alias)
+        self.delay = delay
+        self.driver = None
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # save_json's temporary file is per process
+        self._timer = None
+
+    def attach(self, driver):
+        """Save ``driver``'s state after every change it sends."""
+        self.driver = driver
+        driver.add_listener(self._on_change)
+        return self
+
+    def _on_change(self, _changes):
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.save)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def save(self):
+        """Write the current state now (cancels a pending debounced save).
+
+        A state with nothing known (e.g. right after *RST) is not saved: it
+        would only replace a state worth resuming.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        driver = self.driver
+        if driver is None:
+            return
+        with self._save_lock:
+            state = driver.snapshot()  # read after clearing the timer: later changes reschedule
+            if all(value is None for value in state.values()):
+                return
+            try:
+                save_json(self.path, {"alias": self.alias, "saved_at": time.time(), "state": state})
+                self.saves += 1
+            except OSError as e:
+                print(f"Could not save amplifier state: {e}")
+
+    def close(self):
+        """Flush a pending save and stop following the driver."""
+        if self.driver is not None:
+            self.driver.remove_listener(self._on_change)
+            self.save()
+            self.driver = None
@@ -1,83 +1,63 @@
+import time
+START_TIME = time.perf_counter()  # for --startup-timing: everything imported below counts as import time
+
+import argparse
 import tkinter as tk
 from tkinter import ttk
-import pyvisa as visa
-
-# the sensitivity of the amplifier
-SENSITIVITY_MAP = {
-    0: "1 pA/V", 1: "2 pA/V", 2: "5 pA/V", 3: "10 pA/V",
-    4: "20 pA/V", 5: "50 pA/V", 6: "100 pA/V", 7: "200 pA/V",
-    8: "500 pA/V", 9: "1 nA/V", 10: "2 nA/V", 11: "5 nA/V",
-    12: "10 nA/V", 13: "20 nA/V", 14: "50 nA/V", 15: "100 nA/V",
-    16: "200 nA/V", 17: "500 nA/V", 18: "1 µA/V", 19: "2 µA/V",
-    20: "5 µA/V", 21: "10 µA/V", 22: "20 µA/V", 23: "50 µA/V",
-    24: "100 µA/V", 25: "200 µA/V", 26: "1 mA/V"
-}
-
-# Input current offset scale
-IOLV_MAP = {
-    0: "0.1 pA", 1: "0.2 pA", 2: "0.5 pA", 3: "1 pA",
-    4: "2 pA", 5: "5 pA", 6: "10 pA", 7: "20 pA",
-    8: "50 pA", 9: "0.1 nA", 10: "0.2 nA", 11: "0.5 nA",
-    12: "1 nA", 13: "2 nA", 14: "5 nA", 15: "10 nA",
-    16: "20 nA", 17: "50 nA", 18: "0.1 µA", 19: "0.2 µA",
-    20: "0.5 µA", 21: "1 µA", 22: "2 µA", 23: "5 µA",
-    24: "10 µA", 25: "20 µA", 26: "50 µA", 27: "0.1 mA",
-    28: "0.2 mA", 29: "0.5 mA"
-}
-
-# Filter type 
-FILTER_TYPE ={
-    0: "6 dB highpass", 1: "12 dB highpass", 2: "6 dB bandpass",
-    3: "6 dB lowpass", 4: "12 dB lowpass", 5: "None"
-}
-
-# Filter frequency list
-LFRQ_LIST = {  # n ranges from 0 (0.03Hz) to 15 (1 MHz) for LFRQ
-    0: "0.03 Hz", 1: "0.1 Hz", 2: "0.3 Hz", 3: "1 Hz",
-    4: "3 Hz", 5: "10 Hz", 6: "30 Hz", 7: "100 Hz",
-    8: "300 Hz", 9: "1 kHz", 10: "3 kHz", 11: "10 kHz",
-    12: "30 kHz", 13: "100 kHz", 14: "300 kHz", 15: "1 MHz"
-}
-
-HFRQ_LIST = {  # n ranges from 0 (0.03Hz) to 11 (10 kHz) for HFRQ
-    0: "0.03 Hz", 1: "0.1 Hz", 2: "0.3 Hz", 3: "1 Hz",
-    4: "3 Hz", 5: "10 Hz", 6: "30 Hz", 7: "100 Hz",
-    8: "300 Hz", 9: "1 kHz", 10: "3 kHz", 11: "10 kHz",
-}
-
-# Gain mode
-GAIN_MODE_MAP = {
-    0: "Low Noise", 1: "High Bandwidth", 2: "Low Drift"
-}
-
-# Bias voltage ON/OFF
-BIAS_ON_OFF = {
-    0: "OFF", 1: "ON"
-}
-
-# invert signal
-INVERT_SIGNAL = {
-    0: "Non-Inverted", 1: "Inverted"
-}
-
-# Blanks 
-BLANK_SIGNAL = {
-    0: "No Blank", 1: "Blank"
-}
+
+from sr570_driver import (
+    SENSITIVITY_MAP, IOLV_MAP, FILTER_TYPE, LFRQ_LIST, HFRQ_LIST,
+    GAIN_MODE_MAP, BIAS_ON_OFF, INVERT_SIGNAL, BLANK_SIGNAL,
+    DEFAULT_VALUES, SR570Driver,
+)
+from sr570_connection import open_amplifier
+from sr570_discovery import DEFAULT_ALIAS, ResourceDiscovery, open_resource_manager
+from sr570_journal import JournalWriter
+from sr570_metrics import Metrics, MetricsServer
+from sr570_model import StateModel
+from sr570_persist import StatePersister, load_state
+from sr570_profiles import ProfileStore, apply_profile
+from sr570_worker import IOWorker, StallMonitor
+
+IMPORT_TIME = time.perf_counter() - START_TIME
 
 class SR570GUI:
-    def __init__(self,root):
-        self.root = root
-        self.root.title("SR570 Pre-amplifier Controller")
+    """Control panel for one SR570.
 
-        # Initialize Resource Manager for PyVISA
-        try:
-            self.rm = visa.ResourceManager()
-            self.instrument = None
-        except Exception as e:
-            self.status_label = ttk.Label(root, text=f"Error initializing VISA: {e}", foreground="red")
-            self.status_label.grid(row=0, column=0, columnspan=2)
-            return
+    ``root`` is a Tk window or any frame to build the panel in. A dashboard
+    showing several amplifiers passes in each amplifier's ``driver``,
+    ``model``, ``worker`` and a shared ``discovery``; anything left out is
+    created here.
+
+    With ``resume`` the panel connects as soon as the ports can be opened
+    and keeps the driver's (resumed) state instead of resetting the
+    amplifier; ``reassert`` writes that state back in one batch.
+    """
+
+    def __init__(self,root, startup_timing=False, driver=None, model=None, worker=None, discovery=None,
+                 alias=DEFAULT_ALIAS, resume=False, reassert=False):
+        self.root = root
+        if isinstance(root, (tk.Tk, tk.Toplevel)):
+            self.root.title("SR570 Pre-amplifier Controller")
+        self.startup_timing = startup_timing
+        self.timings = {"imports": IMPORT_TIME}  # seconds, see report_startup_timing
+        self.alias = alias
+        self.resume = resume
+        self.reassert = reassert
+        self.replay_on_connect = True  # write a known state back when (re)connecting
+        self.resume_on_connect = False  # never reset on the next connect, even with unknown parameters
+
+        # The VISA resource manager is created in the background (init_visa),
+        # so the window does not wait for backend discovery
+        self.rm = None
+        self.discovery = discovery
+        self.driver = driver if driver is not None else SR570Driver()
+        self.worker = worker if worker is not None else IOWorker(root)  # all instrument I/O runs on this thread
+        self.stall_monitor = StallMonitor(root)
+        if model is None:
+            model = StateModel(root)  # labels subscribe to this and redraw once per idle cycle
+            model.attach(self.driver)
+        self.model = model
 
         # Create a Frame for Connection Buttons
         button_frame = ttk.Frame(root)
@@ -94,35 +74,19 @@ class SR570GUI:
         # Disconnect Button
         self.disconnect_button = ttk.Button(button_frame, text="Disconnect", command=self.disconnect_device)
         self.disconnect_button.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+
+        # Port: the remembered port of this amplifier; choosing another one moves the amplifier there
+        self.port_combobox = ttk.Combobox(button_frame, values=[])
+        self.port_combobox.grid(row=0, column=2, padx=5, pady=10, sticky="ew")
         self.disconnect_button["state"] = "disabled"  # Initially disabled
 
         # Status Label
-        self.status_label = ttk.Label(root, text="Status: Disconnected", foreground="red")
+        self.status_label = ttk.Label(root, text="Status: Initializing VISA...", foreground="orange")
         self.status_label.grid(row=1, column=0, columnspan=3, pady=5)
 
-        # Initialize GUI components
-        self.sensitivity_label = None
-        self.iolv_label = None
-        self.bias_value_label = None
-        self.filter_value_label = None
-        self.gain_value_label = None
-        self.invt_label = None
-        self.blnk_label = None
-
-        # Initialize default values
-        self.default_values = {
-            "sensitivity": 0,  # n=0
-            "input_offset_level": 0,  # n=0
-            "input_offset_sign": 0,  # Negative (0)
-            "bias_state": 0,  # OFF
-            "bias_voltage": 0.0,  # 0.0 V
-            "filter_type": 5,  # None
-            "low_filter_freq": 0,  # 0.03 Hz
-            "high_filter_freq": 0,  # 0.03 Hz
-            "gain_mode": 0,  # Low Noise
-            "invert_signal": 0,  # Non-Inverted
-            "blank_output": 0,  # No Blank
-        }
+        # Initialize default values (pushed to the instrument on connect)
+        self.default_values = dict(DEFAULT_VALUES)
+        self.profiles = ProfileStore()  # saved measurement configurations
 
         # Create GUI components
         self.add_sensitivity_control(root) # Sensitivity Control
@@ -130,111 +94,173 @@ class SR570GUI:
         self.add_input_offset_sign_control(root) # Input Offset Sign (IOSN) Control
         self.add_bias_voltage_control(root) # Bias voltage Control
         self.add_filter_control(root) # Filter Control
+        self.add_filter_plan_control(root) # Fastest filter for a bandwidth target
         self.add_gain_mode_control(root) # Gain Mode Control
         self.add_invert_control(root) # Invert Signal Control
         self.add_blank_control(root) # Blank Output Control
         self.add_reset_control(root) # Reset Control
+        self.add_profile_control(root) # Profile Control
 
         # Initialize GUI with default values
         self.update_gui_with_defaults()
 
+        if self.discovery is not None:
+            self.on_discovery_ready()
+            self.resume_connection()
+            return
 
-    def connect_device(self):
-        """Connect to the SR570 pre-amplifier using PyVISA."""
-        try:
-            self.status_label.config(text="Status: Connecting...", foreground="orange")
+        # Controls stay disabled until the resource manager is ready
+        self.set_controls_state("disabled")
+        self.root.bind("<Map>", self.on_first_paint, add="+")
+        self.worker.submit(self.init_visa, on_done=self.on_visa_ready, on_error=self.on_visa_failed)
+
+    def init_visa(self):
+        """Create the resource manager and probe the serial ports (runs on the I/O thread)."""
+        start = time.perf_counter()
+        rm = open_resource_manager()
+        self.timings["rm_init"] = time.perf_counter() - start
+        discovery = ResourceDiscovery(rm)  # cached ports and known amplifier
+        discovery.list_resources()  # rescans only if the cached port list is stale
+        return rm, discovery
+
+    def on_visa_ready(self, result):
+        self.rm, self.discovery = result
+        self.timings["controls_ready"] = time.perf_counter() - START_TIME
+        self.set_controls_state("normal")
+        self.on_discovery_ready()
+        self.resume_connection()
+        self.report_startup_timing()
+
+    def on_discovery_ready(self):
+        """Show the connection state once ports can be opened."""
+        if not self.port_combobox.get():
+            self.port_combobox.set(self.discovery.resolve(self.alias) or "")
+        self.worker.submit(self.discovery.list_resources, on_done=self.show_ports, on_error=self.show_error)
+        connected = self.driver.connected
+        self.connect_button["state"] = "disabled" if connected else "normal"
+        self.disconnect_button["state"] = "normal" if connected else "disabled"
+        if connected:
+            self.status_label.config(text="Status: Connected", foreground="green")
+        else:
+            self.status_label.config(text="Status: Disconnected", foreground="red")
+
+    def resume_connection(self):
+        """In resume mode, reconnect at startup without resetting the amplifier."""
+        if self.resume and not self.driver.connected:
+            self.resume = False  # only once
+            self.replay_on_connect = self.reassert
+            self.resume_on_connect = True
+            self.connect_device()
+
+    def on_visa_failed(self, e):
+        self.status_label.config(text=f"Error initializing VISA: {e}", foreground="red")
+        print(f"Error initializing VISA: {e}")
+        if self.startup_timing:
+            self.root.destroy()
+
+    def set_controls_state(self, state):
+        """Enable ("normal") or disable ("disabled") every button, combobox and entry."""
+        widgets = list(self.root.winfo_children())
+        while widgets:
+            widget = widgets.pop()
+            widgets.extend(widget.winfo_children())
+            if isinstance(widget, (ttk.Button, ttk.Entry)):  # includes ttk.Combobox
+                widget["state"] = state
+
+    def on_first_paint(self, event):
+        if event.widget is self.root and "first_paint" not in self.timings:
+            self.timings["first_paint"] = time.perf_counter() - START_TIME
+            self.report_startup_timing()
+
+    def report_startup_timing(self):
+        """With --startup-timing, print the startup times and quit once the window is usable.
+
+        Times are from the start of the imports: import time, time until the
+        window was first mapped, resource manager creation, and time until
+        the controls were enabled.
+        """
+        if not self.startup_timing or not {"first_paint", "controls_ready"} <= self.timings.keys():
+            return
+        t = {name: seconds * 1e3 for name, seconds in self.timings.items()}
+        print(f"Startup: imports {t['imports']:.1f} ms, first paint {t['first_paint']:.1f} ms, "
+              f"RM init {t['rm_init']:.1f} ms, controls ready {t['controls_ready']:.1f} ms")
+        self.root.after_idle(self.root.destroy)
 
-            # List available VISA resources
-            resources = self.rm.list_resources()
-            if not resources:
-                raise ValueError("No devices found")
 
-            self.instrument = self.rm.open_resource(resources[0])
-            self.instrument.write("*RST")  # Reset amplifier 
-            self.status_label.config(text="Status: Connected", foreground="green")
+    def show_ports(self, resources):
+        self.port_combobox["values"] = list(resources)
 
-            # Apply default values to the instrument
-            self.apply_defaults_to_instrument()
-
-            self.connect_button["state"] = "disabled"
-            self.disconnect_button["state"] = "normal"
-
-            # Check if components are initialized before accessing them
-            if hasattr(self, "sensitivity_label") and self.sensitivity_label:
-                self.get_current_sensitivity()
-            if hasattr(self, "iolv_label") and self.iolv_label:
-                self.get_current_iolv()
-            if hasattr(self, "bias_value_label") and self.bias_value_label:
-                self.get_current_bias()
-            if hasattr(self, "filter_value_label") and self.filter_value_label:
-                self.get_current_filter()
-            if hasattr(self, "gain_value_label") and self.gain_value_label:
-                self.get_current_gain()
-            if hasattr(self, "invt_label") and self.invt_label:
-                self.get_current_invert()
-            if hasattr(self, "blnk_label") and self.blnk_label:
-                self.get_current_blank()
-            
-        except Exception as e:
-            self.status_label.config(text=f"Status: Connection Failed ({e})", foreground="red")
-            print(f"Connection failed: {e}")  # Debugging output
-            self.instrument = None    
+    def connect_device(self):
+        """Connect to the SR570 pre-amplifier using PyVISA."""
+        self.status_label.config(text="Status: Connecting...", foreground="orange")
+        self.connect_button["state"] = "disabled"
+        port = self.port_combobox.get().strip() or None
+        self.worker.submit(self.open_instrument, port, on_done=self.on_connected, on_error=self.on_connect_failed)
+
+    def open_instrument(self, port=None):
+        """Open and configure the instrument (runs on the I/O thread).
+
+        ``port`` is the port chosen in the window; if it differs from the
+        remembered one, the amplifier's alias is moved to it.
+        """
+        # A dropped link is reopened on the same port and the last known state replayed.
+        # A resumed state is kept as it is (no *RST) or, with reassert, its known parameters written back
+        # in one batch; unknown ones stay unknown.
+        replay, self.replay_on_connect = self.replay_on_connect, True
+        resume, self.resume_on_connect = self.resume_on_connect, False
+        open_amplifier(self.driver, lambda: self.discovery.open(self.alias, port), self.default_values,
+                       replay=replay, resume=resume)
+
+    def on_connected(self, _result):
+        """Update the window once the instrument is open."""
+        self.status_label.config(text="Status: Connected", foreground="green")
+        self.connect_button["state"] = "disabled"
+        self.disconnect_button["state"] = "normal"
+
+    def on_connect_failed(self, e):
+        self.status_label.config(text=f"Status: Connection Failed ({e})", foreground="red")
+        print(f"Connection failed: {e}")  # Debugging output
+        self.connect_button["state"] = "normal"
 
 
     def disconnect_device(self):
         """ disconnect to the SR570 pre-amplifier using pyVISA """
-        if self.instrument:
-            self.instrument.close()
-            self.instrument = None
+        self.worker.submit(self.driver.close, on_done=self.on_disconnected, on_error=self.show_error)
+
+    def on_disconnected(self, _result):
         self.status_label.config(text='Status: Disconnected', foreground='red')
         self.connect_button['state']= 'normal'
         self.disconnect_button['state'] = 'disabled'
 
+    def show_error(self, e):
+        """Show an error raised on the I/O thread."""
+        self.status_label.config(text=f"Error: {e}", foreground="red")
+        if not self.driver.connected:  # a reconnect gave up
+            self.connect_button["state"] = "normal"
+            self.disconnect_button["state"] = "disabled"
+
     def update_gui_with_defaults(self):
-        """Update GUI with default values safely."""
-        if hasattr(self, 'sensitivity_combobox'):
-            self.sensitivity_combobox.set(self.default_values["sensitivity"])
-        if hasattr(self, 'iolv_combobox'):
-            self.iolv_combobox.set(self.default_values["input_offset_level"])
-        if hasattr(self, 'iosn_combobox'):
-            self.iosn_combobox.set("Negative (0)" if self.default_values["input_offset_sign"] == 0 else "Positive (1)")
-        if hasattr(self, 'bson_combobox'):
-            self.bson_combobox.set("OFF (0)" if self.default_values["bias_state"] == 0 else "ON (1)")
+        """Update GUI with default values safely (the known values of a resumed state win)."""
+        values = dict(self.default_values)
+        values.update((key, n) for key, n in self.driver.snapshot().items() if n is not None)
+        comboboxes = {
+            "sensitivity_combobox": ("sensitivity", SENSITIVITY_MAP),
+            "iolv_combobox": ("input_offset_level", IOLV_MAP),
+            "iosn_combobox": ("input_offset_sign", {0: "Negative", 1: "Positive"}),
+            "bson_combobox": ("bias_state", BIAS_ON_OFF),
+            "filtt_combobox": ("filter_type", FILTER_TYPE),
+            "lfrq_combobox": ("low_filter_freq", LFRQ_LIST),
+            "hfrq_combobox": ("high_filter_freq", HFRQ_LIST),
+            "gmd_combobox": ("gain_mode", GAIN_MODE_MAP),
+            "invt_combobox": ("invert_signal", INVERT_SIGNAL),
+            "blnk_combobox": ("blank_output", BLANK_SIGNAL),
+        }
+        for name, (key, labels) in comboboxes.items():
+            if hasattr(self, name):
+                getattr(self, name).set(f"{labels[values[key]]} ({values[key]})")
         if hasattr(self, 'bslv_entry'):
             self.bslv_entry.delete(0, tk.END)
-            self.bslv_entry.insert(0, self.default_values["bias_voltage"])
-        if hasattr(self, 'filtt_combobox'):
-            self.filtt_combobox.set("None (5)")
-        if hasattr(self, 'lfrq_combobox'):
-            self.lfrq_combobox.set("0.03 Hz (0)")
-        if hasattr(self, 'hfrq_combobox'):
-            self.hfrq_combobox.set("0.03 Hz (0)")
-        if hasattr(self, 'gmd_combobox'):
-            self.gmd_combobox.set("Low Noise (0)")
-        if hasattr(self, 'invt_combobox'):
-            self.invt_combobox.set("Non-Inverted (0)")
-        if hasattr(self, 'blnk_combobox'):
-            self.blnk_combobox.set("No Blank (0)")
-
-    def apply_defaults_to_instrument(self):
-        """Apply default values to the instrument via VISA commands."""
-        if not self.instrument:
-            return
-        try:
-            self.instrument.write(f"SENS {self.default_values['sensitivity']}")
-            self.instrument.write(f"IOLV {self.default_values['input_offset_level']}")
-            self.instrument.write(f"IOSN {self.default_values['input_offset_sign']}")
-            self.instrument.write(f"BSON {self.default_values['bias_state']}")
-            self.instrument.write(f"BSLV {self.default_values['bias_voltage']}")
-            self.instrument.write(f"FLTT {self.default_values['filter_type']}")
-            self.instrument.write(f"LFRQ {self.default_values['low_filter_freq']}")
-            self.instrument.write(f"HFRQ {self.default_values['high_filter_freq']}")
-            self.instrument.write(f"GNMD {self.default_values['gain_mode']}")
-            self.instrument.write(f"INVT {self.default_values['invert_signal']}")
-            self.instrument.write(f"BLNK {self.default_values['blank_output']}")
-        except Exception as e:
-            print(f"Error applying defaults to instrument: {e}")
-
+            self.bslv_entry.insert(0, values["bias_voltage"] / 1000)  # mV -> V
 
     def add_sensitivity_control(self,root):
         """ Add sensitivty control section """
@@ -249,38 +275,33 @@ class SR570GUI:
 
         self.sensitivity_label = ttk.Label(root, text='Current Sensitivity: Unknown')
         self.sensitivity_label.grid(row=3, column=0, columnspan=3, pady=5)
+        self.model.subscribe("sensitivity", self.show_sensitivity)
 
     def apply_sensitivity(self):
         """ Apply Sensitivity setting """
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         try:
             selected_value = self.sensitivity_combobox.get()
             n_value = int(selected_value.split("(")[-1].strip(")"))  # Extract the 'n' value
-            self.instrument.write(f"SENS {n_value}")  
-            scale = SENSITIVITY_MAP.get(n_value, "Unknown")
-            self.sensitivity_label.config(text=f"Current Sensitivity: {scale} (n={n_value})", foreground="blue")
-            self.status_label.config(text=f"Sensitivity Set: {scale}", foreground="blue")
-
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
-
-    def get_current_sensitivity(self):
-        """Retrieve and display the current sensitivity setting."""
-        if not self.instrument:
-            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
 
-        try:
-            n_value = self.default_values["sensitivity"]
+        def done(_sent):
             scale = SENSITIVITY_MAP.get(n_value, "Unknown")
-            self.sensitivity_label.config(text=f"Current Sensitivity: {scale} (n={n_value})")
+            self.status_label.config(text=f"Sensitivity Set: {scale}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "sensitivity", n_value, on_done=done, on_error=self.show_error)
+
+    def show_sensitivity(self, state):
+        """Display the current sensitivity setting."""
+        n_value = state["sensitivity"]
+        scale = SENSITIVITY_MAP.get(n_value, "Unknown")
+        self.sensitivity_label.config(text=f"Current Sensitivity: {scale} (n={n_value})")
+
 
-        except Exception as e:
-            self.sensitivity_label.config(text=f"Error: {e}", foreground="red")        
-        
-    
     def add_input_offset_control(self, root):
         """ Add Input Offset Current control section """
         
@@ -297,35 +318,31 @@ class SR570GUI:
         # Current IOLV Value Display
         self.iolv_label = ttk.Label(root, text="Current Offset: Unknown")
         self.iolv_label.grid(row=5, column=0, columnspan=3, pady=5)
+        self.model.subscribe("input_offset_level", self.show_iolv)
 
     def apply_input_offset_level(self):
         """ Apply Input Offset Current Level (IOLV n) """ 
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         
         try:
             n_value_IOLV = int(self.iolv_combobox.get().split('(')[-1].strip(')'))  # Get selected n value
-            self.instrument.write(f"IOLV {n_value_IOLV}")  
-            scale = IOLV_MAP.get(n_value_IOLV, "Unknown")
-            self.iolv_label.config(text=f"Current Offset: {scale} (n={n_value_IOLV})", foreground="blue")
-            self.status_label.config(text=f"IOLV Set: {scale}", foreground="blue")
-
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
-
-    def get_current_iolv(self):
-        """Retrieve and display the current Input Offset Level (IOLV) setting."""
-        if not self.instrument:
-            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
 
-        try:
-            n_value = self.default_values["input_offset_level"]
-            scale = IOLV_MAP.get(n_value, "Unknown")
-            self.iolv_label.config(text=f"Current Offset: {scale} (n={n_value})")
-        except Exception as e:
-            self.iolv_label.config(text=f"Error: {e}", foreground="red")
+        def done(_sent):
+            scale = IOLV_MAP.get(n_value_IOLV, "Unknown")
+            self.status_label.config(text=f"IOLV Set: {scale}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "input_offset_level", n_value_IOLV, on_done=done, on_error=self.show_error)
+
+    def show_iolv(self, state):
+        """Display the current Input Offset Level (IOLV) setting."""
+        n_value = state["input_offset_level"]
+        scale = IOLV_MAP.get(n_value, "Unknown")
+        self.iolv_label.config(text=f"Current Offset: {scale} (n={n_value})")
 
     def add_input_offset_sign_control(self, root):
         """ Add Input Offset Sign (IOSN) control section """
@@ -339,19 +356,27 @@ class SR570GUI:
 
         self.iosn_label = ttk.Label(root, text="Current Sign: Unknown")
         self.iosn_label.grid(row=7, column=0, columnspan=3, pady=5)
+        self.model.subscribe("input_offset_sign", self.show_iosn)
 
     def apply_input_offset_sign(self):
         """ Apply Input Offset Sign (IOSN n) """
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         
-        try:
-            sign_value = 1 if "Positive" in self.iosn_combobox.get() else 0
-            self.instrument.write(f"IOSN {sign_value}")  
-            self.iosn_label.config(text=f"Current Sign: {'Positive' if sign_value == 1 else 'Negative'}", foreground="blue")
-        except Exception as e:
-            self.iosn_label.config(text=f"Error: {e}", foreground="red")        
+        sign_value = 1 if "Positive" in self.iosn_combobox.get() else 0
+
+        def done(_sent):
+            self.status_label.config(text=f"Input Offset Sign Set: {'Positive' if sign_value == 1 else 'Negative'}",
+                                     foreground="blue")
+
+        self.worker.submit(self.driver.set, "input_offset_sign", sign_value, on_done=done, on_error=self.show_error)
+
+    def show_iosn(self, state):
+        """Display the current Input Offset Sign (IOSN) setting."""
+        n_value = state["input_offset_sign"]
+        sign = {0: "Negative", 1: "Positive"}.get(n_value, "Unknown")
+        self.iosn_label.config(text=f"Current Sign: {sign}")
 
     
     def add_bias_voltage_control(self, root):
@@ -373,50 +398,45 @@ class SR570GUI:
 
         self.bias_value_label = ttk.Label(root, text="Current Bias Voltage: Unknown")
         self.bias_value_label.grid(row=10, column=0, columnspan=3, pady=5)
+        self.model.subscribe(("bias_state", "bias_voltage"), self.show_bias)
 
-    def get_current_bias(self):
-        """Retrieve and display the current Bias State and Voltage."""
-        if not self.instrument:
-            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
-            return
+    def show_bias(self, state):
+        """Display the current Bias State and Voltage."""
+        n_value = state["bias_state"]  # 0: OFF, 1: ON
+        bias_state = BIAS_ON_OFF.get(n_value, "Unknown")
 
-        try:
-            # Retrieve the current bias state and voltage from the default values or instrument
-            n_value = self.default_values.get("bias_state", 0)  # 0: OFF, 1: ON
-            bias_state = BIAS_ON_OFF.get(n_value, "Unknown")
-
-            bias_voltage_mv = self.default_values.get("bias_voltage", 0)  # Default in mV
-            bias_voltage_v = bias_voltage_mv / 1000  # Convert to volts for display
+        bias_voltage_mv = state["bias_voltage"]  # in mV
+        if bias_voltage_mv is None:
+            bias_voltage_text = "Unknown"
+        else:
+            bias_voltage_text = f"{bias_voltage_mv / 1000:.2f} V"  # Convert to volts for display
 
-            # Update the GUI components with the current state and voltage
+        if n_value is not None:
             self.bson_combobox.set(f"{bias_state} ({n_value})")
-            self.bias_value_label.config(
-                text=f"State: {bias_state}, Value: {bias_voltage_v:.2f} V")  
-
-        except Exception as e:
-            self.bias_value_label.config(text=f"Error: {e}", foreground="red")
+        self.bias_value_label.config(text=f"State: {bias_state}, Value: {bias_voltage_text}")
 
     def apply_bson(self):
         """ Apply Bias Voltage On/Off (BSON n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         
         try:
             selected_value = self.bson_combobox.get()
             n_value = int(selected_value.split("(")[-1].strip(")"))  # Extract numeric value
-            self.instrument.write(f"BSON {n_value}")  
-            self.default_values["bias_state"] = n_value  # Update default value
-            self.bias_value_label.config(text=f"Current Bias set: {BIAS_ON_OFF[n_value]}", foreground="blue")
-            self.status_label.config(text=f"Bias Voltage State Set to {BIAS_ON_OFF[n_value]}", foreground="blue")
-            self.get_current_bias()  # Update the label to reflect the applied value
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def done(_sent):
+            self.status_label.config(text=f"Bias Voltage State Set to {BIAS_ON_OFF[n_value]}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "bias_state", n_value, on_done=done, on_error=self.show_error)
 
 
     def apply_bslv(self):
         """Apply Bias Voltage Level (BSLV n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         
@@ -426,18 +446,20 @@ class SR570GUI:
             # Check ranges (-5.0V ~ 5.0V)
             if -5.0 <= user_input <= 5.0:
                 # convert V to mV 
-                value_mV = int(user_input * 1000)
-                # transfter converted voltage values
-                self.instrument.write(f"BSON1;BSLV{value_mV}")
-                # update voltage input status
-                self.default_values["bias_voltage"] = value_mV
-                self.status_label.config(text=f"Bias Voltage Set to {user_input:.3f} V", foreground="blue")
+                value_mV = round(user_input * 1000)
             else:
                 self.status_label.config(text="Error: Voltage out of range (-5.0V to 5.0V).", foreground="red")
+                return
         except ValueError:
             self.status_label.config(text="Error: Invalid input. Please enter a number.", foreground="red")
-        except Exception as e:
-            self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def done(_result):
+            self.status_label.config(text=f"Bias Voltage Set to {user_input:.3f} V", foreground="blue")
+
+        # transfter converted voltage values; apply_profile sends the voltage before switching the bias on
+        self.worker.submit(apply_profile, self.driver, {"bias_state": 1, "bias_voltage": value_mV},
+                           on_done=done, on_error=self.show_error)
     
 
     def add_filter_control(self, root):
@@ -479,25 +501,29 @@ class SR570GUI:
 
         self.high_freq_label = ttk.Label(root, text="High Frequency: Unknown")
         self.high_freq_label.grid(row=15, column=2, padx=10, pady=5)
+        self.model.subscribe(("filter_type", "low_filter_freq", "high_filter_freq"), self.show_filter)
 
 
     def apply_fltt(self):
         """Apply Filter Type (FLTT n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         try:
             value = int(self.filtt_combobox.get().split('(')[-1][0])
-            self.instrument.write(f"FLTT {value}")
-            self.default_values['filter_type'] = value  # update applied values
-            self.get_current_filter()  # update filter status
-            self.status_label.config(text=f"Filter Type Set to {self.filtt_combobox.get()}", foreground="blue")
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+        selected = self.filtt_combobox.get()
+
+        def done(_sent):
+            self.status_label.config(text=f"Filter Type Set to {selected}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "filter_type", value, on_done=done, on_error=self.show_error)
 
     def apply_lfrq(self):
         """Apply Low Filter Frequency (LFRQ n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         try:
@@ -505,25 +531,23 @@ class SR570GUI:
             value = int(self.lfrq_combobox.get().split('(')[-1].strip(')'))
             
             # Check if value is within valid range for LFRQ
-            if 0 <= value <= 15:
-                self.instrument.write(f"LFRQ {value}")  
-                self.default_values['low_filter_freq'] = value  # Update default value
-                self.low_freq_label.config(
-                    text=f"Low Frequency: {LFRQ_LIST[value]} (n={value})", 
-                    foreground="blue"
-                )
-                self.status_label.config(
-                    text=f"Low Filter Frequency Set to {LFRQ_LIST[value]} (n={value})",
-                    foreground="blue"
-                )
-            else:
+            if not 0 <= value <= 15:
                 raise ValueError(f"LFRQ value {value} is out of range (0-15).")
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def done(_sent):
+            self.status_label.config(
+                text=f"Low Filter Frequency Set to {LFRQ_LIST[value]} (n={value})",
+                foreground="blue"
+            )
+
+        self.worker.submit(self.driver.set, "low_filter_freq", value, on_done=done, on_error=self.show_error)
 
     def apply_hfrq(self):
         """Apply High Filter Frequency (HFRQ n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         try:
@@ -531,87 +555,88 @@ class SR570GUI:
             value = int(self.hfrq_combobox.get().split('(')[-1].strip(')'))
             
             # Check if value is within valid range for HFRQ
-            if 0 <= value <= 11:
-                self.instrument.write(f"HFRQ {value}")  
-                self.default_values['high_filter_freq'] = value  # Update default value
-                self.high_freq_label.config(
-                    text=f"High Frequency: {HFRQ_LIST[value]} (n={value})", 
-                    foreground="blue"
-                )
-                self.status_label.config(
-                    text=f"High Filter Frequency Set to {HFRQ_LIST[value]} (n={value})",
-                    foreground="blue"
-                )
-            else:
+            if not 0 <= value <= 11:
                 raise ValueError(f"HFRQ value {value} is out of range (0-11).")
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def done(_sent):
+            self.status_label.config(
+                text=f"High Filter Frequency Set to {HFRQ_LIST[value]} (n={value})",
+                foreground="blue"
+            )
+
+        self.worker.submit(self.driver.set, "high_filter_freq", value, on_done=done, on_error=self.show_error)
 
     def reset_filter(self):
         """Reset Filter (ROAD command)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
 
-        try:
-            # Set filter type to 'None'
-            self.instrument.write("FLTT 5")  # Command to disable filter (set to None)
-            self.default_values.update({
-                "filter_type": 5,  # None
-                "low_filter_freq": 0,  # Reset low frequency (not applicable)
-                "high_filter_freq": 0  # Reset high frequency (not applicable)
-            })
-
-            # Update filter type label
-            if hasattr(self, 'filter_type_label'):
-                self.filter_type_label.config(text="Filter Type: None", foreground="blue")
-                # print("Filter Type label updated.")
-            else:
-                print("Error: 'filter_type_label' is not initialized.")
+        def done(_sent):
+            self.status_label.config(text="Filter Reset to 'None' Successfully", foreground="blue")
 
-            # Update low and high frequency labels (not applicable in this mode)
-            if hasattr(self, 'low_freq_label'):
-                self.low_freq_label.config(text="Low Filter Freq: Not Applicable", foreground="blue")
-                # print("Low Filter Frequency label updated.")
-            else:
-                print("Error: 'low_freq_label' is not initialized.")
+        # Set filter type to 'None'
+        self.worker.submit(self.driver.set, "filter_type", 5,  # Command to disable filter (set to None)
+                           on_done=done, on_error=self.show_error)
 
-            if hasattr(self, 'high_freq_label'):
-                self.high_freq_label.config(text="High Filter Freq: Not Applicable", foreground="blue")
-                # print("High Filter Frequency label updated.")
-            else:
-                print("Error: 'high_freq_label' is not initialized.")
+    def add_filter_plan_control(self, root):
+        """Add a row that picks the fastest-settling filter for a bandwidth target."""
+        ttk.Label(root, text="Signal Bandwidth (Hz)").grid(row=25, column=0, padx=10, pady=5)
+        self.bandwidth_entry = ttk.Entry(root)
+        self.bandwidth_entry.grid(row=25, column=1, padx=10, pady=5)
 
-            # Display success message
-            self.status_label.config(text="Filter Reset to 'None' Successfully", foreground="blue")
+        plan_button = ttk.Button(root, text="Fastest Filter", command=self.apply_filter_plan)
+        plan_button.grid(row=25, column=2, padx=10, pady=5)
 
-        except Exception as e:
-            # Handle errors and update the status label
-            self.status_label.config(text=f"Error: {e}", foreground="red")
+    def apply_filter_plan(self):
+        """Apply the fastest-settling filter that passes the entered bandwidth.
 
-    def get_current_filter(self):
-        """Retrieve and display the current Filter Settings."""
-        if not self.instrument:
+        The bandwidth entry takes "B" (signal bandwidth in Hz) or "B, N" with
+        N the largest acceptable noise bandwidth in Hz.
+        """
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
-
         try:
-            # Retrieve current filter settings from default values
-            filter_type = self.default_values.get('filter_type', 5)
-            low_freq = self.default_values.get('low_filter_freq', 0)
-            high_freq = self.default_values.get('high_filter_freq', 0)
-
-            # Map the filter type, low frequency, and high frequency to human-readable values
-            filter_name = FILTER_TYPE.get(filter_type, "Unknown")
-            low_freq_value = LFRQ_LIST.get(low_freq, "Unknown")
-            high_freq_value = HFRQ_LIST.get(high_freq, "Unknown")
-
-            # Update the respective labels with retrieved values
-            self.filter_type_label.config(text=f"Filter Type: {filter_name}", foreground="blue")
-            self.low_freq_label.config(text=f"Low Frequency: {low_freq_value}", foreground="blue")
-            self.high_freq_label.config(text=f"High Frequency: {high_freq_value}", foreground="blue")
+            numbers = [float(v) for v in self.bandwidth_entry.get().split(",")]
+            if not 1 <= len(numbers) <= 2:
+                raise ValueError("Enter a bandwidth, optionally followed by a noise bandwidth.")
         except Exception as e:
-            self.status_label.config(text=f"Error updating filter information: {e}", foreground="red")
+            self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def plan_and_apply():
+            from sr570_filters import plan_filter  # imported on first use: keeps startup fast
+            option = plan_filter(self.driver.snapshot(), *numbers)
+            self.driver.apply(option.settings)
+            return option
+
+        def done(option):
+            self.status_label.config(
+                text=f"Filter Set: {FILTER_TYPE[option.settings['filter_type']]}, "
+                     f"-3 dB at {option.bandwidth:.3g} Hz, settles in {option.settle_time * 1e3:.3g} ms",
+                foreground="blue"
+            )
+
+        self.worker.submit(plan_and_apply, on_done=done, on_error=self.show_error)
+
+    def show_filter(self, state):
+        """Display the current Filter Settings."""
+        filter_type = state['filter_type']
+        filter_name = FILTER_TYPE.get(filter_type, "Unknown")
+        if filter_type == 5:
+            # no filter: the corner frequencies are not applicable
+            low_freq_value = high_freq_value = "Not Applicable"
+        else:
+            low_freq_value = LFRQ_LIST.get(state['low_filter_freq'], "Unknown")
+            high_freq_value = HFRQ_LIST.get(state['high_filter_freq'], "Unknown")
+
+        self.filter_type_label.config(text=f"Filter Type: {filter_name}")
+        self.low_freq_label.config(text=f"Low Frequency: {low_freq_value}")
+        self.high_freq_label.config(text=f"High Frequency: {high_freq_value}")
 
 
     def add_gain_mode_control(self, root):
@@ -626,36 +651,32 @@ class SR570GUI:
 
         self.gain_value_label = ttk.Label(root, text="Current Gain Mode: Unknown")
         self.gain_value_label.grid(row=17, column=0, columnspan=3, pady=5)
+        self.model.subscribe("gain_mode", self.show_gain)
 
     def apply_gmd(self):
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
 
         try:     
             selected_value = self.gmd_combobox.get()
             n_value = int(selected_value.split("(")[-1].strip(")"))  # Extract the 'n' value
-            self.instrument.write(f"GNMD {n_value}")  
-            scale = GAIN_MODE_MAP.get(n_value, "Unknown")
-            self.gain_value_label.config(text=f"Current Gain Mode: {scale} (n={n_value})", foreground="blue")
-            self.status_label.config(text=f"Gain Mode Set: {scale}", foreground="blue")
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
-    
-
-    def get_current_gain(self):
-        """Retrieve and display the current Gain Mode."""
-        if not self.instrument:
-            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
 
-        try:
-            n_value = self.default_values["gain_mode"]
+        def done(_sent):
             scale = GAIN_MODE_MAP.get(n_value, "Unknown")
-            self.gain_value_label.config(text=f"Current gain mode: {scale} (n={n_value})")
-            
-        except Exception as e:
-            self.gain_value_label.config(text=f"Error: {e}", foreground="red")
+            self.status_label.config(text=f"Gain Mode Set: {scale}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "gain_mode", n_value, on_done=done, on_error=self.show_error)
+    
+
+    def show_gain(self, state):
+        """Display the current Gain Mode."""
+        n_value = state["gain_mode"]
+        scale = GAIN_MODE_MAP.get(n_value, "Unknown")
+        self.gain_value_label.config(text=f"Current Gain Mode: {scale} (n={n_value})")
 
 
     def add_invert_control(self, root):
@@ -670,36 +691,31 @@ class SR570GUI:
 
         self.invt_label = ttk.Label(root, text="Current Invert: Unknown")
         self.invt_label.grid(row=19, column=0, columnspan=3, pady=5)
+        self.model.subscribe("invert_signal", self.show_invert)
 
     def apply_invt(self):
         """Apply Invert Signal (INVT n)."""
-        if not self.instrument:
+        if not self.driver.connected:
                 self.status_label.config(text="Error: Not connected to any device.", foreground="red")
                 return
         try:
             selected_value = self.invt_combobox.get()
             n_value = int(selected_value.split("(")[-1].strip(")"))  # Extract numeric value
-            self.instrument.write(f"INVT {n_value}")  
-            self.default_values["invert_signal"] = n_value  # Update default value
-            self.invt_label.config(text=f"Current set: {INVERT_SIGNAL[n_value]}", foreground = "blue")
-            self.status_label.config(text=f"Invert Signal Set to {INVERT_SIGNAL[n_value]}", foreground="blue")
-            self.get_current_invert()  # Update the label to reflect the applied value
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
 
+        def done(_sent):
+            self.status_label.config(text=f"Invert Signal Set to {INVERT_SIGNAL[n_value]}", foreground="blue")
 
-    def get_current_invert(self):
-        """Retrieve and display the current Invert Signal state."""
-        if not self.instrument:
-            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
-            return
+        self.worker.submit(self.driver.set, "invert_signal", n_value, on_done=done, on_error=self.show_error)
 
-        try:
-            n_value = self.default_values.get("invert_signal", 0)  # Get the current value from defaults
-            invert_text = INVERT_SIGNAL.get(n_value, "Unknown")  # Map to descriptive text
-            self.invt_label.config(text=f"Current Invert: {invert_text} (n={n_value})")  # Update label
-        except Exception as e:
-            self.invt_label.config(text=f"Error: {e}", foreground="red")
+
+    def show_invert(self, state):
+        """Display the current Invert Signal state."""
+        n_value = state["invert_signal"]
+        invert_text = INVERT_SIGNAL.get(n_value, "Unknown")  # Map to descriptive text
+        self.invt_label.config(text=f"Current Invert: {invert_text} (n={n_value})")
 
 
 
@@ -715,31 +731,31 @@ class SR570GUI:
 
         self.blnk_label = ttk.Label(root, text="Current Blank State: Unknown")
         self.blnk_label.grid(row=21, column=0, columnspan=3, pady=5)
+        self.model.subscribe("blank_output", self.show_blank)
     
     def apply_blnk(self):
         """Apply Blank Front-End Output (BLNK n)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
         try:
             selected_value = self.blnk_combobox.get()
             n_value = int(selected_value.split("(")[-1].strip(")"))  # Extract numeric value
-            self.instrument.write(f"BLNK {n_value}")  # Send command to device
-            self.default_values["blank_output"] = n_value  # Update default value
-            self.blnk_label.config(text=f"Current set: {BLANK_SIGNAL[n_value]})", foreground="blue")
-            self.status_label.config(text=f"Blank Output Set to {BLANK_SIGNAL[n_value]}", foreground="blue")
-            self.get_current_blank()  # Update the label to reflect the applied value
         except Exception as e:
-            self.status_label.config(text=f"Error: {e}", foreground="red") 
+            self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
 
-    def get_current_blank(self):
-        """Retrieve and display the current Blank Output state."""
-        try:
-            n_value = self.default_values.get("blank_output", 0)  # Get the current value from defaults
-            blank_text = BLANK_SIGNAL.get(n_value, "Unknown")  # Map to descriptive text
-            self.blnk_label.config(text=f"Current Blank State: {blank_text} (n={n_value})")  # Update label
-        except Exception as e:
-            self.blnk_label.config(text=f"Error: {e}", foreground="red")
+        def done(_sent):
+            self.status_label.config(text=f"Blank Output Set to {BLANK_SIGNAL[n_value]}", foreground="blue")
+
+        self.worker.submit(self.driver.set, "blank_output", n_value,  # Send command to device
+                           on_done=done, on_error=self.show_error)
+
+    def show_blank(self, state):
+        """Display the current Blank Output state."""
+        n_value = state["blank_output"]
+        blank_text = BLANK_SIGNAL.get(n_value, "Unknown")  # Map to descriptive text
+        self.blnk_label.config(text=f"Current Blank State: {blank_text} (n={n_value})")
 
 
     def add_reset_control(self, root):
@@ -749,17 +765,97 @@ class SR570GUI:
 
     def apply_reset(self):
         """Reset Amplifier to Default Settings (*RST)."""
-        if not self.instrument:
+        if not self.driver.connected:
             self.status_label.config(text="Error: Not connected to any device.", foreground="red")
             return
-        try:
-            self.instrument.write("*RST")
+
+        def done(_result):
             self.status_label.config(text="Amplifier Reset to Default Settings", foreground="blue")
+
+        self.worker.submit(self.driver.reset, on_done=done, on_error=self.show_error)
+
+
+    def add_profile_control(self, root):
+        """Add Profile Control Section (saved measurement configurations)."""
+        ttk.Label(root, text="Profile").grid(row=23, column=0, padx=10, pady=5)
+        self.profile_combobox = ttk.Combobox(root, values=self.profiles.names())
+        self.profile_combobox.grid(row=23, column=1, padx=10, pady=5)
+
+        profile_apply_button = ttk.Button(root, text="Apply", command=self.apply_selected_profile)
+        profile_apply_button.grid(row=23, column=2, padx=10, pady=5)
+
+        profile_save_button = ttk.Button(root, text="Save Current Settings as Profile", command=self.save_profile)
+        profile_save_button.grid(row=24, column=0, columnspan=3, pady=5)
+
+    def apply_selected_profile(self):
+        """Switch to the selected profile, sending only the parameters that differ."""
+        if not self.driver.connected:
+            self.status_label.config(text="Error: Not connected to any device.", foreground="red")
+            return
+        name = self.profile_combobox.get().strip()
+        try:
+            values = self.profiles.get(name)
+        except KeyError as e:
+            self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+
+        def done(changes):
+            self.status_label.config(text=f"Profile {name} Applied ({len(changes)} changed)", foreground="blue")
+
+        self.worker.submit(apply_profile, self.driver, values, on_done=done, on_error=self.show_error)
+
+    def save_profile(self):
+        """Save the current known settings under the name in the profile box."""
+        name = self.profile_combobox.get().strip()
+        if not name:
+            self.status_label.config(text="Error: Enter a profile name.", foreground="red")
+            return
+        try:
+            self.profiles.save(name, self.driver.snapshot())
         except Exception as e:
             self.status_label.config(text=f"Error: {e}", foreground="red")
+            return
+        self.profile_combobox["values"] = self.profiles.names()
+        self.status_label.config(text=f"Profile {name} Saved", foreground="blue")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SR570 Pre-amplifier Controller")
+    parser.add_argument("--journal", metavar="PATH", help="append every setting change to this journal file")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print import, VISA init and first-paint times, then quit")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of all I/O to PATH on exit")
+    parser.add_argument("--resume", action="store_true",
+                        help="show the saved amplifier state and reconnect without resetting the amplifier")
+    parser.add_argument("--reassert", action="store_true",
+                        help="with --resume, write the saved state back to the amplifier in one batch")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = SR570GUI(root)
-    root.mainloop()
\ No newline at end of file
+    driver = SR570Driver()
+    resume = args.resume
+    if resume:
+        saved = load_state()
+        if saved is None:
+            print("No saved state: starting normally (Connect resets the amplifier to the defaults).")
+            resume = False
+        else:
+            driver.state.update(saved)
+    app = SR570GUI(root, startup_timing=args.startup_timing, driver=driver, resume=resume,
+                   reassert=args.reassert)
+    persister = StatePersister().attach(driver)  # crash-safe copy of the state for --resume
+    if args.journal:
+        JournalWriter(args.journal).attach(app.driver)
+    metrics = None
+    if args.metrics_port is not None or args.trace:
+        metrics = Metrics(trace=bool(args.trace))
+        app.driver.metrics = metrics
+        app.worker.metrics = metrics
+        if args.metrics_port is not None:
+            MetricsServer(metrics, port=args.metrics_port).start()
+    root.mainloop()
+    persister.close()
+    if args.trace:
+        metrics.write_trace(args.trace)
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Named measurement profiles and minimal, safely ordered switching between them.
+
+Profiles (e.g. "dark current", "transmission", "fluorescence") are stored in
+CONFIG_DIR/profiles.json as {name: {parameter: value}}. A profile may list
+only some parameters; the others are left as they are.
+
+Switching only sends the parameters that differ from the driver's shadow
+state (unknown ones are always sent), in an order that never passes through
+an unsafe intermediate setting:
+
+* bias off goes first and bias on goes last, so the bias is never switched
+  on at the old voltage;
+* the input offset never passes through a larger offset than the old and
+  new settings, i.e. a smaller level is sent before a sign change and a
+  larger level after it.
+
+    store = ProfileStore()
+    store.save("transmission", {"sensitivity": 12, "bias_state": 1, "bias_voltage": -500})
+    apply_profile(driver, store.get("transmission"))
+"""
+
+import os
+import threading
+
+from sr570_driver import CONFIG_DIR, PARAMETERS, coerce_value, load_json, save_json
+
+PROFILES_FILE = os.path.join(CONFIG_DIR, "profiles.json")
+
+
+class ProfileStore:
+    """Named profiles persisted as JSON."""
+
+    def __init__(self, path=PROFILES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.profiles = dict(load_json(path, {}) or {})
+
+    def names(self):
+        return sorted(self.profiles)
+
+    def __contains__(self, name):
+        return name in self.profiles
+
+    def get(self, name):
+        """Return the validated settings of profile ``name``."""
+        if name not in self.profiles:
+            raise KeyError(f"Unknown profile: {name}")
+        return {key: coerce_value(key, value) for key, value in self.profiles[name].items()}
+
+    def save(self, name, values):
+        """Store ``values`` (parameter -> 'n' value or label) under ``name``."""
+        values = {key: coerce_value(key, value) for key, value in values.items() if value is not None}
+        with self._lock:
+            self.profiles[name] = values
+            save_json(self.path, self.profiles)
+
+    def delete(self, name):
+        with self._lock:
+            if self.profiles.pop(name, None) is not None:
+                save_json(self.path, self.profiles)
+
+
+def plan_transition(state, target):
+    """Return the ordered changes that take ``state`` to ``target``.
+
+    ``state`` is a shadow-state dict (None = unknown), ``target`` a dict of
+    validated 'n' values. Parameters already at their target are left out.
+    """
+    return order_changes(state, {key: n for key, n in target.items() if state.get(key) != n})
+
+
+def order_changes(state, changes):
+    """Return ``changes`` reordered so that leaving ``state`` is safe."""
+    if not changes:
+        return {}
+
+    first, middle, last = {}, {}, {}
+    if changes.get("bias_state") == 0:
+        first["bias_state"] = 0
+    elif changes.get("bias_state") == 1:
+        last["bias_state"] = 1
+
+    level = changes.get("input_offset_level")
+    sign = changes.get("input_offset_sign")
+    if level is not None and sign is not None:
+        old_level = state.get("input_offset_level")
+        if old_level is None or level < old_level:
+            offset = {"input_offset_level": level, "input_offset_sign": sign}
+        else:
+            offset = {"input_offset_sign": sign, "input_offset_level": level}
+    else:
+        offset = {key: changes[key] for key in ("input_offset_level", "input_offset_sign") if key in changes}
+
+    for key in PARAMETERS:
+        if key in changes and key not in first and key not in last:
+            if key in offset:
+                middle.update(offset)  # the offset pair in its safe order
+            else:
+                middle[key] = changes[key]
+    return {**first, **middle, **last}
+
+
+def apply_profile(driver, values, force=False):
+    """Switch ``driver`` to the settings in ``values``. Returns the changes sent, in order."""
+    return driver.apply(values, force=force, order=order_changes).changes
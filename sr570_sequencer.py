@@ -0,0 +1,144 @@
+"""Precompiled parameter sweeps on a monotonic-clock schedule.
+
+A ScanPlan (one parameter, its values, the dwell time per point and an
+optional acquire callback) is compiled ahead of time into the exact frames
+each point sends. Running the scan then only writes ready-made frames at
+fixed deadlines ``start + i * dwell``; deadlines do not drift when a point
+runs late, and the lateness of every write is reported as jitter.
+
+    sequencer = Sequencer(driver)
+    scan = sequencer.compile(ScanPlan("bias_voltage", range(-1000, 1001, 50), dwell=0.5,
+                                      acquire=lambda i, value: detector.read()))
+    report = sequencer.run(scan)
+    print(report)
+"""
+
+import math
+import time
+
+from sr570_driver import coerce_value
+
+
+class ScanPlan:
+    """Sweep of one parameter.
+
+    ``values`` are in driver units ('n' values, mV for bias_voltage).
+    ``acquire(index, value)`` is called ``settle`` seconds after each write;
+    its return value is collected in the report.
+    """
+
+    def __init__(self, parameter, values, dwell, acquire=None, settle=0.0):
+        if settle > dwell:
+            raise ValueError("settle must not be longer than dwell")
+        self.parameter = parameter
+        self.values = list(values)
+        self.dwell = dwell
+        self.acquire = acquire
+        self.settle = settle
+
+
+class CompiledScan:
+    """A ScanPlan with the frames of every point already built."""
+
+    def __init__(self, plan, points):
+        self.plan = plan
+        self.points = points  # list of (value, [(frame, changes), ...])
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def bytes(self):
+        return sum(len(frame) for _, compiled in self.points for frame, _ in compiled)
+
+
+class ScanReport:
+    """Timing of an executed scan. Times in seconds."""
+
+    def __init__(self, jitter, results, duration, dwell):
+        self.jitter = jitter  # write time minus scheduled time, per point
+        self.results = results  # acquire() return values
+        self.duration = duration
+        self.overruns = sum(1 for j in jitter if j > dwell)
+
+    @property
+    def mean_jitter(self):
+        return sum(self.jitter) / len(self.jitter) if self.jitter else 0.0
+
+    @property
+    def max_jitter(self):
+        return max(self.jitter, default=0.0)
+
+    @property
+    def std_jitter(self):
+        if len(self.jitter) < 2:
+            return 0.0
+        mean = self.mean_jitter
+        return math.sqrt(sum((j - mean) ** 2 for j in self.jitter) / (len(self.jitter) - 1))
+
+    def percentile_jitter(self, fraction):
+        if not self.jitter:
+            return 0.0
+        ordered = sorted(self.jitter)
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+    def __str__(self):
+        rate = len(self.jitter) / self.duration * 3600 if self.duration else 0.0
+        return (f"{len(self.jitter)} points in {self.duration:.3f} s ({rate:.0f} points/h), "
+                f"jitter mean {self.mean_jitter * 1e3:.3f} ms, std {self.std_jitter * 1e3:.3f} ms, "
+                f"p95 {self.percentile_jitter(0.95) * 1e3:.3f} ms, max {self.max_jitter * 1e3:.3f} ms, "
+                f"overruns {self.overruns}")
+
+
+class Sequencer:
+    """Compiles and runs ScanPlans on one driver."""
+
+    def __init__(self, driver, clock=time.monotonic, sleep=time.sleep, spin=0.002, tracker=None):
+        self.driver = driver
+        self.tracker = tracker  # SettleTracker; acquisition also waits for its ready_at
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = spin  # busy-wait this long before a deadline for accuracy
+
+    def compile(self, plan):
+        """Build the frames of every point of ``plan``.
+
+        Points whose value equals the previous one send nothing. The first
+        point is always sent, so the scan starts from a known value even if
+        the amplifier was changed after compiling.
+        """
+        points = []
+        previous = None
+        for value in plan.values:
+            n = coerce_value(plan.parameter, value)
+            changes = {} if n == previous else {plan.parameter: n}
+            points.append((n, self.driver.compile(changes)))
+            previous = n
+        return CompiledScan(plan, points)
+
+    def wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > self.spin:
+            self.sleep(remaining - self.spin)
+        while self.clock() < deadline:
+            pass
+
+    def run(self, scan, start_at=None):
+        """Execute a CompiledScan and return a ScanReport."""
+        plan = scan.plan
+        start = self.clock() if start_at is None else start_at
+        jitter = []
+        results = []
+        for i, (value, compiled) in enumerate(scan.points):
+            deadline = start + i * plan.dwell
+            self.wait_until(deadline)
+            jitter.append(self.clock() - deadline)
+            self.driver.send(compiled)
+            if plan.acquire is not None:
+                acquire_at = deadline + plan.settle
+                if self.tracker is not None:
+                    acquire_at = max(acquire_at, self.tracker.ready_at)
+                self.wait_until(acquire_at)
+                results.append(plan.acquire(i, value))
+        self.wait_until(start + len(scan.points) * plan.dwell)
+        return ScanReport(jitter, results, self.clock() - start, plan.dwell)
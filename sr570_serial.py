@@ -0,0 +1,98 @@
+"""Direct pyserial transport for the SR570, bypassing the VISA stack.
+
+The SR570 only listens on its RS-232 port: it is configured by writing
+command lines and never answers. A transport therefore only has to frame the
+bytes correctly (9600 baud, 8 data bits, no parity, 2 stop bits, no
+handshake) and write them; nothing is ever read. SerialTransport has the
+``write``/``close``/``write_termination`` interface of a pyvisa resource, so
+it can be used as ``driver.instrument`` or behind a SupervisedConnection.
+
+    driver = SR570Driver(SerialTransport("/dev/ttyUSB0"))
+
+SerialResourceManager lets ResourceDiscovery and the GUI use it through the
+"@serial" backend (``SR570_VISA_BACKEND=@serial``). pyserial is imported only
+when a port is opened or listed.
+"""
+
+import os
+import re
+
+from sr570_driver import WRITE_TERMINATION
+
+BAUD_RATE = 9600
+
+ASRL_PATTERN = re.compile(r"^ASRL(.+)::INSTR$", re.IGNORECASE)
+
+
+class SerialTransport:
+    """Write-only serial connection to one SR570.
+
+    ``port`` is a device name ("/dev/ttyUSB0", "COM3") or any pyserial URL
+    (e.g. "loop://" for testing). With ``drain`` every write waits until the
+    bytes have left the UART, so a returned write has reached the wire.
+    """
+
+    def __init__(self, port, baud_rate=BAUD_RATE, write_termination=WRITE_TERMINATION, write_timeout=2.0,
+                 drain=True):
+        import serial
+
+        self.port = port
+        self.resource_name = port  # SerialResourceManager sets the VISA-style name
+        self.write_termination = write_termination
+        self.drain = drain
+        self.serial = serial.serial_for_url(
+            port,
+            baudrate=baud_rate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_TWO,
+            timeout=0,
+            write_timeout=write_timeout,
+            xonxoff=False,
+            rtscts=False,
+            dsrdtr=False,
+        )
+
+    def write(self, message):
+        data = (message + (self.write_termination or "")).encode("ascii")
+        self.serial.write(data)
+        if self.drain:
+            self.serial.flush()
+        return len(data)
+
+    def close(self):
+        self.serial.close()
+
+
+def port_from_resource(resource_name):
+    """Map a VISA serial resource name to a pyserial port.
+
+    "ASRL/dev/ttyUSB0::INSTR" -> "/dev/ttyUSB0", "ASRLCOM3::INSTR" -> "COM3",
+    and "ASRL3::INSTR" -> "COM3" on Windows or "/dev/ttyS2" elsewhere.
+    Anything else is taken as a port name already.
+    """
+    match = ASRL_PATTERN.match(resource_name)
+    if not match:
+        return resource_name
+    port = match.group(1)
+    if port.isdigit():
+        return f"COM{port}" if os.name == "nt" else f"/dev/ttyS{int(port) - 1}"
+    return port
+
+
+class SerialResourceManager:
+    """Minimal ``pyvisa.ResourceManager`` stand-in that opens SerialTransports."""
+
+    def list_resources(self, query="?*::INSTR"):
+        from serial.tools import list_ports
+
+        return tuple(f"ASRL{port.device}::INSTR" for port in list_ports.comports())
+
+    def open_resource(self, resource_name, write_termination=WRITE_TERMINATION, **options):
+        baud_rate = options.get("baud_rate", BAUD_RATE)
+        transport = SerialTransport(port_from_resource(resource_name), baud_rate, write_termination)
+        transport.resource_name = resource_name
+        return transport
+
+    def close(self):
+        pass
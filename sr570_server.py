@@ -0,0 +1,288 @@
+"""Network control server that shares one SR570 between many clients.
+
+The server owns the VISA session and accepts JSON-lines requests on a local
+TCP or Unix socket, so the scan engine, an alignment tool and the operator
+console can all drive the same amplifier. Requests are put on the wire by
+one writer task. Set requests that arrive while a write is in flight are
+merged into a single apply, a later value for a parameter replacing an
+earlier one (latest wins), and every merged request is acknowledged with
+the state after that apply. Each apply is sent in a safe order: bias off
+first, bias on last (see sr570_profiles).
+
+    python sr570_server.py --alias I0 --port 5570
+
+    client = SR570Client(port=5570)
+    client.set(sensitivity=12, filter_type=4)
+
+Requests, one JSON object per line:
+
+    {"id": 1, "op": "set", "values": {"sensitivity": 12}, "force": false}
+    {"id": 2, "op": "get"}
+    {"id": 3, "op": "reset"}
+
+Replies carry the same id, ``"ok"`` and the shadow ``"state"``, or an
+``"error"`` message. Set replies also report how many requests shared the
+write (``"coalesced"``) and the frames it sent.
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sr570_connection import SupervisedConnection
+from sr570_discovery import DEFAULT_ALIAS, ResourceDiscovery, open_resource_manager
+from sr570_driver import PARAMETERS, SR570Driver, coerce_value
+from sr570_metrics import Metrics, MetricsServer
+from sr570_profiles import order_changes
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5570
+
+
+class _Write:
+    """One queued write: merged set requests, or a reset."""
+
+    def __init__(self, op):
+        self.op = op
+        self.values = {}
+        self.forced = set()
+        self.waiters = []
+
+
+class ControlServer:
+    """Serializes and coalesces client requests onto one SR570Driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.clients = 0
+        self.requests = 0
+        self.writes = 0
+        self._queue = []
+        self._wakeup = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sr570-server")
+        self._writer = None
+        self._server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """Start listening on TCP ``host:port`` or on the Unix socket ``unix_path``."""
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_client, unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._writer is not None:
+            self._writer.cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.driver.close)
+        self._executor.shutdown(wait=False)
+
+    def set(self, values, force=False):
+        """Queue a set request. Returns a future resolving to the reply fields."""
+        values = {key: coerce_value(key, value) for key, value in values.items()}
+        if self._queue and self._queue[-1].op == "set":
+            write = self._queue[-1]
+        else:
+            write = _Write("set")
+            self._queue.append(write)
+        for key, n in values.items():  # latest wins
+            write.values[key] = n
+            if force:
+                write.forced.add(key)
+        return self._enqueue_waiter(write)
+
+    def reset(self):
+        """Queue a *RST. Set requests before and after it are not merged across it."""
+        write = _Write("reset")
+        self._queue.append(write)
+        return self._enqueue_waiter(write)
+
+    def _enqueue_waiter(self, write):
+        future = asyncio.get_running_loop().create_future()
+        write.waiters.append(future)
+        self._wakeup.set()
+        return future
+
+    def _flush(self, write):
+        """Put one queued write on the wire (runs on the I/O thread)."""
+        if write.op == "reset":
+            self.driver.reset()
+            return {"frames": ["*RST"], "state": dict.fromkeys(PARAMETERS)}
+        # the state is taken inside the apply, so a later write cannot leak into the reply
+        result = self.driver.apply(write.values, force=write.forced, order=order_changes)
+        return {"frames": result.frames, "state": result.state}
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                write = self._queue.pop(0)
+                try:
+                    reply = await loop.run_in_executor(self._executor, self._flush, write)
+                except Exception as e:
+                    for future in write.waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self.writes += 1
+                reply["coalesced"] = len(write.waiters)
+                for future in write.waiters:
+                    if not future.done():
+                        future.set_result(reply)
+
+    async def handle_request(self, request):
+        """Process one decoded request and return the reply dict."""
+        self.requests += 1
+        op = request.get("op")
+        if op == "set":
+            reply = dict(await self.set(request.get("values", {}), force=bool(request.get("force"))))
+        elif op == "reset":
+            reply = dict(await self.reset())
+        elif op == "get":
+            reply = {"state": self.driver.snapshot()}
+        else:
+            raise ValueError(f"Unknown op: {op}")
+        return reply
+
+    async def _handle_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = await self.handle_request(request)
+                    reply["ok"] = True
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                reply["id"] = request.get("id") if isinstance(request, dict) else None
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+
+class SR570Client:
+    """Blocking client for ControlServer.
+
+    Replies are matched to requests in order, so one client object should be
+    used by one thread at a time.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, timeout=10.0):
+        if unix_path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        self._ids = itertools.count(1)
+
+    def request(self, op, **fields):
+        """Send one request and return its reply. Raises RuntimeError on an error reply."""
+        request = dict(fields, id=next(self._ids), op=op)
+        self._sock.sendall(json.dumps(request).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error"))
+        return reply
+
+    def set(self, values=None, force=False, **params):
+        """Set parameters, e.g. ``client.set(sensitivity=12)``. Returns the reply."""
+        return self.request("set", values=dict(values or {}, **params), force=force)
+
+    def get(self):
+        """Return the server's shadow state."""
+        return self.request("get")["state"]
+
+    def reset(self):
+        return self.request("reset")
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+async def serve(driver, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    server = ControlServer(driver)
+    await server.start(host, port, unix_path)
+    where = unix_path or f"{host}:{port}"
+    print(f"SR570 server listening on {where}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Share one SR570 between several clients over a local socket.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--resource", help="VISA resource name, e.g. ASRL1::INSTR (needed for a new alias)")
+    parser.add_argument("--alias", default=DEFAULT_ALIAS, help="amplifier alias remembered by discovery")
+    parser.add_argument("--backend", help="VISA backend, e.g. @py or @sr570-sim")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of all I/O to PATH on exit")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    discovery = ResourceDiscovery(open_resource_manager(args.backend))
+    if args.resource is None and discovery.resolve(args.alias) is None:
+        parser.error(f"unknown amplifier alias {args.alias!r}: pass --resource once to bind it to a port")
+    driver = SR570Driver()
+    opener = functools.partial(discovery.open, args.alias, args.resource)
+    driver.instrument = SupervisedConnection(driver, opener).connect()
+    print(f"Connected to {discovery.resolve(args.alias)} in {time.perf_counter() - start:.3f} s")
+
+    if args.metrics_port is not None or args.trace:
+        driver.metrics = Metrics(trace=bool(args.trace))
+        if args.metrics_port is not None:
+            MetricsServer(driver.metrics, port=args.metrics_port).start()
+    try:
+        asyncio.run(serve(driver, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.trace:
+            driver.metrics.write_trace(args.trace)
+
+
+if __name__ == "__main__":
+    main()
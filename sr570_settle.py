@@ -0,0 +1,153 @@
+"""Settle-time model and "ready-at" tracking for the amplifier output.
+
+After a SENS, GNMD, FLTT, LFRQ, HFRQ, IOLV or IOSN change the output needs
+time to settle. The time depends on the active filter corner and on the
+front-end bandwidth, which itself depends on the sensitivity and the gain
+mode.
+SettleTracker listens to a driver and keeps a ``ready_at`` timestamp: a
+change pushes it to ``now + settle_time(new state)`` unless it is already
+later, so back-to-back changes overlap their settle windows instead of
+stacking them.
+
+    tracker = SettleTracker(driver)
+    driver.apply({"sensitivity": 12, "low_filter_freq": 9})
+    tracker.wait_settled()
+"""
+
+import asyncio
+import functools
+import math
+import time
+
+from sr570_driver import HFRQ_VALUES, LFRQ_VALUES, SENSITIVITY_MAP
+
+# Parameters whose change disturbs the output
+SETTLE_KEYS = ("sensitivity", "gain_mode", "filter_type", "low_filter_freq", "high_filter_freq",
+               "input_offset_level", "input_offset_sign")
+
+# Residual error (fraction of the step) at which the output counts as settled
+SETTLE_ACCURACY = 1e-3
+
+# Approximate -3 dB bandwidth (Hz) of the front end per sensitivity range:
+# about a decade per three 1-2-5 ranges, with High Bandwidth roughly ten
+# times faster than Low Noise / Low Drift. Used only for settle estimates.
+HIGH_BANDWIDTH = 1
+FRONT_END_BANDWIDTH = {n: min(1e6, 20 * 10 ** (n / 3)) for n in SENSITIVITY_MAP}
+FRONT_END_BANDWIDTH_LOW_NOISE = {n: min(2e5, 2 * 10 ** (n / 3)) for n in SENSITIVITY_MAP}
+
+# filter type -> (highpass order, lowpass order)
+FILTER_ORDERS = {
+    0: (1, 0),  # 6 dB highpass
+    1: (2, 0),  # 12 dB highpass
+    2: (1, 1),  # 6 dB bandpass
+    3: (0, 1),  # 6 dB lowpass
+    4: (0, 2),  # 12 dB lowpass
+    5: (0, 0),  # None
+}
+
+
+@functools.lru_cache(maxsize=None)
+def settle_time_constants(order, accuracy=SETTLE_ACCURACY):
+    """Time constants for a chain of ``order`` equal real poles to settle to ``accuracy``.
+
+    The step error of n equal poles is exp(-x) * sum(x**k / k!, k < n) with
+    x = t / tau; solved here by bisection.
+    """
+    if order <= 0:
+        return 0.0
+
+    def error(x):
+        return math.exp(-x) * sum(x ** k / math.factorial(k) for k in range(order))
+
+    lo, hi = 0.0, 100.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if error(mid) > accuracy:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def pole_settle_time(frequency, order, accuracy=SETTLE_ACCURACY):
+    """Settle time (s) of ``order`` poles at ``frequency`` Hz."""
+    if order <= 0:
+        return 0.0
+    return settle_time_constants(order, accuracy) / (2 * math.pi * frequency)
+
+
+def front_end_bandwidth(sensitivity, gain_mode):
+    table = FRONT_END_BANDWIDTH if gain_mode == HIGH_BANDWIDTH else FRONT_END_BANDWIDTH_LOW_NOISE
+    return table[sensitivity]
+
+
+def settle_time(state, accuracy=SETTLE_ACCURACY):
+    """Return the settle time (s) of the output for the settings in ``state``.
+
+    Unknown (None) settings are replaced by the slowest possible choice.
+    The slowest stage dominates, so the result is the largest of the front
+    end, the lowpass and the highpass settle times.
+    """
+    sensitivity = state.get("sensitivity")
+    gain_mode = state.get("gain_mode")
+    filter_type = state.get("filter_type")
+    low = state.get("low_filter_freq")
+    high = state.get("high_filter_freq")
+
+    bandwidth = front_end_bandwidth(0 if sensitivity is None else sensitivity,
+                                    0 if gain_mode is None else gain_mode)
+    times = [pole_settle_time(bandwidth, 1, accuracy)]
+
+    if filter_type is None:
+        highpass_order, lowpass_order = 2, 2
+    else:
+        highpass_order, lowpass_order = FILTER_ORDERS[filter_type]
+    if lowpass_order:
+        times.append(pole_settle_time(LFRQ_VALUES[0 if low is None else low], lowpass_order, accuracy))
+    if highpass_order:
+        times.append(pole_settle_time(HFRQ_VALUES[0 if high is None else high], highpass_order, accuracy))
+    return max(times)
+
+
+class SettleTracker:
+    """Tracks when the output of one amplifier will have settled."""
+
+    def __init__(self, driver, accuracy=SETTLE_ACCURACY, clock=time.monotonic, sleep=time.sleep):
+        self.driver = driver
+        self.accuracy = accuracy
+        self.clock = clock
+        self.sleep = sleep
+        self.ready_at = clock()
+        driver.add_listener(self._on_change)
+
+    def _on_change(self, changes):
+        if any(key in changes for key in SETTLE_KEYS):
+            ready_at = self.clock() + settle_time(self.driver.state, self.accuracy)
+            self.ready_at = max(self.ready_at, ready_at)
+
+    def remaining(self):
+        """Seconds until the output is settled (0 if it already is)."""
+        return max(0.0, self.ready_at - self.clock())
+
+    def wait_settled(self):
+        """Block until the output has settled. Returns the time waited."""
+        waited = 0.0
+        remaining = self.remaining()
+        while remaining > 0:
+            self.sleep(remaining)
+            waited += remaining
+            remaining = self.remaining()  # a change may have arrived meanwhile
+        return waited
+
+    async def wait_settled_async(self):
+        """Awaitable version of ``wait_settled``."""
+        waited = 0.0
+        remaining = self.remaining()
+        while remaining > 0:
+            await asyncio.sleep(remaining)
+            waited += remaining
+            remaining = self.remaining()
+        return waited
+
+    def detach(self):
+        self.driver.remove_listener(self._on_change)
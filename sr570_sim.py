@@ -0,0 +1,171 @@
+"""Simulated SR570 for running the controller without hardware.
+
+SimulatedResourceManager stands in for ``pyvisa.ResourceManager``: it lists
+simulated serial ports and ``open_resource`` returns sessions with the same
+``write``/``close``/``write_termination`` interface as a pyvisa resource.
+Each simulated amplifier parses the SR570 command set, checks the ranges of
+the parameter maps, executes a line only when its terminator arrives and
+models the wire time of the RS-232 link.
+
+Set ``SR570_VISA_BACKEND=@sr570-sim`` to run the GUI or any script that
+uses ``open_resource_manager`` against the simulator.
+"""
+
+import fnmatch
+import time
+
+# VISA status codes raised by the simulator, shared with the error classifier
+from sr570_connection import VI_ERROR_CONN_LOST, VI_ERROR_INV_OBJECT, VI_ERROR_RSRC_NFOUND, VI_ERROR_TMO
+from sr570_driver import DEFAULT_VALUES, PARAMETERS, coerce_value
+
+BAUD_RATE = 9600
+BITS_PER_BYTE = 11  # start bit, 8 data bits, 2 stop bits
+
+COMMANDS = {command: key for key, (command, choices) in PARAMETERS.items()}
+
+
+class SimulatedVisaError(Exception):
+    """Raised by the simulator; carries a VISA status code like pyvisa's VisaIOError."""
+
+    def __init__(self, error_code, message=""):
+        super().__init__(message or f"VISA error {error_code}")
+        self.error_code = error_code
+
+
+class SimulatedSR570:
+    """One simulated amplifier: parser, state and wire-time model.
+
+    With ``realtime`` the writes sleep for the modelled wire time; otherwise
+    the time is only accumulated in ``wire_time``. With ``strict`` an invalid
+    command raises ValueError (the real instrument ignores it silently);
+    otherwise it is recorded in ``errors``. ``write_overhead`` adds a fixed
+    per-write cost (seconds) for the VISA call and adapter latency.
+    """
+
+    def __init__(self, resource_name="ASRL1::INSTR", baud_rate=BAUD_RATE, realtime=False, strict=True,
+                 write_overhead=0.0):
+        self.resource_name = resource_name
+        self.baud_rate = baud_rate
+        self.write_overhead = write_overhead
+        self.realtime = realtime
+        self.strict = strict
+        self.state = dict(DEFAULT_VALUES)
+        self.log = []  # executed commands, e.g. "SENS12"
+        self.errors = []
+        self.bytes_received = 0
+        self.writes = 0
+        self.wire_time = 0.0
+        self.connected = True
+        self._buffer = ""
+        self._failures = []
+
+    def byte_time(self, nbytes):
+        """Seconds needed to shift ``nbytes`` over the serial line."""
+        return nbytes * BITS_PER_BYTE / self.baud_rate
+
+    def fail_next(self, count=1, error_code=VI_ERROR_TMO):
+        """Make the next ``count`` writes fail with ``error_code``."""
+        self._failures.extend([error_code] * count)
+
+    def unplug(self):
+        """Simulate a pulled cable: writes fail until ``plug`` is called."""
+        self.connected = False
+
+    def plug(self):
+        self.connected = True
+
+    def write_raw(self, data):
+        """Receive raw characters from the host. Returns the number of bytes."""
+        if not self.connected:
+            raise SimulatedVisaError(VI_ERROR_CONN_LOST, "Connection lost")
+        if self._failures:
+            raise SimulatedVisaError(self._failures.pop(0))
+        raw = data.encode("latin-1")
+        duration = self.byte_time(len(raw)) + self.write_overhead
+        if self.realtime:
+            time.sleep(duration)
+        self.wire_time += duration
+        self.bytes_received += len(raw)
+        self.writes += 1
+
+        for char in data:
+            if char in "\r\n":
+                line, self._buffer = self._buffer, ""
+                if line.strip():
+                    self.execute_line(line)
+            else:
+                self._buffer += char
+        return len(raw)
+
+    def execute_line(self, line):
+        """Execute one terminated line of ';'-separated commands."""
+        for command in line.split(";"):
+            command = command.strip()
+            if not command:
+                continue
+            mnemonic, argument = command[:4].upper(), command[4:].strip()
+            try:
+                if mnemonic == "*RST":
+                    self.state = dict(DEFAULT_VALUES)
+                elif mnemonic in COMMANDS:
+                    key = COMMANDS[mnemonic]
+                    self.state[key] = coerce_value(key, float(argument))
+                else:
+                    raise ValueError(f"Unknown command: {command}")
+            except ValueError as e:
+                self.errors.append(f"{command}: {e}")
+                if self.strict:
+                    raise ValueError(f"{command}: {e}") from e
+                continue
+            self.log.append(command)
+
+    def reset_counters(self):
+        self.log.clear()
+        self.errors.clear()
+        self.bytes_received = 0
+        self.writes = 0
+        self.wire_time = 0.0
+
+
+class SimulatedSession:
+    """Session handle returned by ``SimulatedResourceManager.open_resource``."""
+
+    def __init__(self, device, write_termination="\r\n", **options):
+        self.device = device
+        self.resource_name = device.resource_name
+        self.write_termination = write_termination
+        self.timeout = options.get("timeout", 2000)
+        self.closed = False
+
+    def write(self, message):
+        if self.closed:
+            raise SimulatedVisaError(VI_ERROR_INV_OBJECT, "Invalid session handle")
+        return self.device.write_raw(message + (self.write_termination or ""))
+
+    def close(self):
+        self.closed = True
+
+
+class SimulatedResourceManager:
+    """Drop-in for ``pyvisa.ResourceManager`` backed by simulated amplifiers.
+
+    The amplifiers keep their state across open/close, like real hardware.
+    """
+
+    def __init__(self, resources=("ASRL1::INSTR",), **device_options):
+        self.devices = {name: SimulatedSR570(name, **device_options) for name in resources}
+
+    def list_resources(self, query="?*::INSTR"):
+        pattern = query.replace("?*", "*")
+        return tuple(name for name in self.devices if fnmatch.fnmatchcase(name, pattern))
+
+    def open_resource(self, resource_name, **options):
+        device = self.devices.get(resource_name)
+        if device is None:
+            raise SimulatedVisaError(VI_ERROR_RSRC_NFOUND, f"Resource not found: {resource_name}")
+        if not device.connected:
+            raise SimulatedVisaError(VI_ERROR_CONN_LOST, f"No response from {resource_name}")
+        return SimulatedSession(device, **options)
+
+    def close(self):
+        pass
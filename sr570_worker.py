@@ -0,0 +1,105 @@
+"""Background I/O thread for the Tk GUI.
+
+Instrument calls are queued and run one at a time, in submission order, on a
+dedicated worker thread. Results are handed back to the Tk thread by polling
+with ``root.after``, so a slow or stalled serial adapter never blocks the
+event loop.
+"""
+
+import queue
+import threading
+import time
+
+
+class IOWorker:
+    """Runs instrument I/O on a background thread and reports back to Tk."""
+
+    def __init__(self, root, poll_ms=15, metrics=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.metrics = metrics  # sr570_metrics.Metrics: queue wait and submit-to-done time per job
+        self.max_callback_time = 0.0  # longest time spent in a result callback (s)
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sr570-io", daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    @property
+    def pending(self):
+        """Number of jobs waiting for the worker thread."""
+        return self._jobs.qsize()
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """Queue ``func(*args)`` for the worker thread.
+
+        ``on_done(result)`` or ``on_error(exception)`` is later called on the
+        Tk thread.
+        """
+        self._jobs.put((func, args, on_done, on_error, time.perf_counter()))
+
+    def stop(self):
+        """Let the worker thread finish the queued jobs and exit."""
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            func, args, on_done, on_error, submitted = job
+            start = time.perf_counter()
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._results.put((on_error, e))
+            else:
+                self._results.put((on_done, result))
+            if self.metrics is not None:
+                name = getattr(func, "__name__", "job")
+                self.metrics.record_job(name, start - submitted, time.perf_counter() - start)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if callback is None:
+                continue
+            start = time.perf_counter()
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Error in I/O callback: {e}")
+            self.max_callback_time = max(self.max_callback_time, time.perf_counter() - start)
+        self.root.after(self.poll_ms, self._poll)
+
+
+class StallMonitor:
+    """Measures how long the Tk event loop goes without servicing timers.
+
+    A heartbeat is scheduled every ``interval_ms``; the amount by which it
+    fires late is the time the loop was blocked. ``max_stall`` is the worst
+    case seen so far, in seconds.
+    """
+
+    def __init__(self, root, interval_ms=50):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.max_stall = 0.0
+        self.last_stall = 0.0
+        self._expected = time.perf_counter() + self.interval
+        self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.last_stall = max(0.0, now - self._expected)
+        self.max_stall = max(self.max_stall, self.last_stall)
+        self._expected = now + self.interval
+        self.root.after(self.interval_ms, self._tick)
+
+    def reset(self):
+        """Forget the worst case seen so far."""
+        self.max_stall = 0.0